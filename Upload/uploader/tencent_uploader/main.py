@@ -15,6 +15,9 @@ from Upload.utils.config_loader import config
 from PIL import Image
 import io
 
+# 并发上传共用同一个账号文件: 扫码登录和写入 account_file 同一时间只允许一个浏览器窗口进行
+_account_lock = asyncio.Lock()
+
 
 def is_docker_environment() -> bool:
     """
@@ -222,6 +225,8 @@ class TencentVideo(object):
         self.account_file = account_file
         self.category = category
         self.local_executable_path = LOCAL_CHROME_PATH
+        # 本窗口载入账号文件时该文件的修改时间
+        self._state_loaded_at = 0.0
 
     async def handle_upload_error(self, page):
         tencent_logger.info("视频出错了，重新上传中")
@@ -230,82 +235,116 @@ class TencentVideo(object):
         file_input = page.locator('input[type="file"]')
         await file_input.set_input_files(self.file_path)
 
+    def _account_mtime(self) -> float:
+        """账号文件最后修改时间 (文件不存在时为 0)"""
+        try:
+            return os.path.getmtime(self.account_file)
+        except OSError:
+            return 0.0
+
+    async def _is_login_page(self, page) -> bool:
+        """检测是否在登录页面"""
+        # 1. URL 检查
+        is_login_url = "/login" in page.url or page.url == "https://channels.weixin.qq.com/"
+        # 2. 页面元素检查
+        current_text = await page.content()
+        has_login_text = "微信扫码" in current_text or "使用微信" in current_text
+        return is_login_url or has_login_text
+
+    async def save_account_state(self, context):
+        """保存登录状态到账号文件 (与其他上传窗口互斥)"""
+        async with _account_lock:
+            await context.storage_state(path=f"{self.account_file}")
+
     async def handle_login_redirect(self, page, context):
         """检测并处理登录重定向"""
         try:
             # 等待几秒让重定向发生
             await asyncio.sleep(3)
-            # 检测是否在登录页面
-            # 1. URL 检查
-            is_login_url = "/login" in page.url or page.url == "https://channels.weixin.qq.com/"
-            # 2. 页面元素检查
-            current_text = await page.content()
-            has_login_text = "微信扫码" in current_text or "使用微信" in current_text
-            if is_login_url or has_login_text:
-                tencent_logger.warning("⚠️ 检测到需要登录 (Cookie失效或被重定向)")
-                tencent_logger.info("📱 请在浏览器中扫描二维码登录...")
-                # 发送 Bark 通知 (带截图)
-                try:
-                    # 设置视口大小以确保裁切准确
-                    await page.set_viewport_size({"width": 1920, "height": 1080})
-
-                    # 截图并上传
-                    screenshot_bytes = await page.screenshot(full_page=True)
-                    # 裁切图片
-                    try:
-                        img = Image.open(io.BytesIO(screenshot_bytes))
-                        # 使用与 Docker 模式相同的坐标 (1330, 330, 1550, 570)
-                        cropped_img = img.crop((1330, 330, 1550, 570))
-                        img_byte_arr = io.BytesIO()
-                        cropped_img.save(img_byte_arr, format='PNG')
-                        final_bytes = img_byte_arr.getvalue()
-                        tencent_logger.info("已裁切二维码区域")
-                    except Exception as crop_err:
-                        tencent_logger.warning(f"裁切失败，使用全屏截图: {crop_err}")
-                        final_bytes = screenshot_bytes
-
-                    image_url = await ImageUploader.upload_to_imgbb(final_bytes)
-
-                    notifier = BarkNotifier(config.bark_key)
-                    notifier.send(
-                        title="📱 需要手动扫码",
-                        content="上传被重定向到登录页，请在服务器/浏览器扫码",
-                        sound="alarm",
-                        level="timeSensitive",
-                        image=image_url,
-                        icon="https://api.iconify.design/mdi:qrcode-scan.svg"
-                    )
-                except Exception as e:
-                    tencent_logger.debug(f"发送通知失败: {e}")
-
-                # 循环等待直到登录成功
-                while True:
-                    if "channels.weixin.qq.com/platform" in page.url:
-                        tencent_logger.success("✅ 检测到 URL 变更为后台地址，登录成功！")
-                        break
-
-                    # 检查昵称元素
-                    if await page.locator("div.finder-nickname").count() > 0:
-                        tencent_logger.success("✅ 检测到用户信息，登录成功！")
-                        break
-
-                    await asyncio.sleep(2)
+            if not await self._is_login_page(page):
+                return
+
+            # 并发上传时多个窗口可能同时被重定向, 只让一个窗口扫码, 其余窗口等待后复用其登录状态
+            async with _account_lock:
+                if self._account_mtime() > self._state_loaded_at:
+                    # 等待期间其他窗口已登录并更新了账号文件: 载入最新 Cookie 后重新进入发布页
+                    with open(self.account_file, 'r', encoding='utf-8') as f:
+                        await context.add_cookies(json.load(f).get('cookies', []))
+                    await page.goto("https://channels.weixin.qq.com/platform/post/create")
+                    await asyncio.sleep(3)
+                    if not await self._is_login_page(page):
+                        tencent_logger.info("✅ 已复用其他上传窗口刚保存的登录状态")
+                        return
+
+                await self._wait_for_qr_login(page, context)
 
-                # 登录成功后保存 Cookie
-                await context.storage_state(path=f"{self.account_file}")
-                tencent_logger.info("💾 新的登录状态已保存")
+        except Exception as e:
+            tencent_logger.error(f"处理登录重定向时出错: {e}")
 
-                # 重新进入发布页面
-                await page.goto("https://channels.weixin.qq.com/platform/post/create")
-                await asyncio.sleep(3)
+    async def _wait_for_qr_login(self, page, context):
+        """发送扫码通知并等待登录成功 (调用方需持有 _account_lock)"""
+        tencent_logger.warning("⚠️ 检测到需要登录 (Cookie失效或被重定向)")
+        tencent_logger.info("📱 请在浏览器中扫描二维码登录...")
+        # 发送 Bark 通知 (带截图)
+        try:
+            # 设置视口大小以确保裁切准确
+            await page.set_viewport_size({"width": 1920, "height": 1080})
 
+            # 截图并上传
+            screenshot_bytes = await page.screenshot(full_page=True)
+            # 裁切图片
+            try:
+                img = Image.open(io.BytesIO(screenshot_bytes))
+                # 使用与 Docker 模式相同的坐标 (1330, 330, 1550, 570)
+                cropped_img = img.crop((1330, 330, 1550, 570))
+                img_byte_arr = io.BytesIO()
+                cropped_img.save(img_byte_arr, format='PNG')
+                final_bytes = img_byte_arr.getvalue()
+                tencent_logger.info("已裁切二维码区域")
+            except Exception as crop_err:
+                tencent_logger.warning(f"裁切失败，使用全屏截图: {crop_err}")
+                final_bytes = screenshot_bytes
+
+            image_url = await ImageUploader.upload_to_imgbb(final_bytes)
+
+            notifier = BarkNotifier(config.bark_key)
+            notifier.send(
+                title="📱 需要手动扫码",
+                content="上传被重定向到登录页，请在服务器/浏览器扫码",
+                sound="alarm",
+                level="timeSensitive",
+                image=image_url,
+                icon="https://api.iconify.design/mdi:qrcode-scan.svg"
+            )
         except Exception as e:
-            tencent_logger.error(f"处理登录重定向时出错: {e}")
+            tencent_logger.debug(f"发送通知失败: {e}")
+
+        # 循环等待直到登录成功
+        while True:
+            if "channels.weixin.qq.com/platform" in page.url:
+                tencent_logger.success("✅ 检测到 URL 变更为后台地址，登录成功！")
+                break
+
+            # 检查昵称元素
+            if await page.locator("div.finder-nickname").count() > 0:
+                tencent_logger.success("✅ 检测到用户信息，登录成功！")
+                break
+
+            await asyncio.sleep(2)
+
+        # 登录成功后保存 Cookie (调用方已持有 _account_lock, 直接写入)
+        await context.storage_state(path=f"{self.account_file}")
+        tencent_logger.info("💾 新的登录状态已保存")
+
+        # 重新进入发布页面
+        await page.goto("https://channels.weixin.qq.com/platform/post/create")
+        await asyncio.sleep(3)
 
     async def upload(self, playwright: Playwright) -> None:
         # 使用 Chromium (这里使用系统内浏览器，用chromium 会造成h264错误
         browser = await playwright.chromium.launch(headless=False, executable_path=self.local_executable_path)
-        # 创建一个浏览器上下文，使用指定的 cookie 文件
+        # 创建一个浏览器上下文，使用指定的 cookie 文件 (记录载入时账号文件的版本, 用于判断其他窗口是否已重新登录)
+        self._state_loaded_at = self._account_mtime()
         context = await browser.new_context(storage_state=f"{self.account_file}")
         context = await set_init_script(context)
 
@@ -338,7 +377,7 @@ class TencentVideo(object):
         # 点击发表
         await self.click_publish(page)
 
-        await context.storage_state(path=f"{self.account_file}")  # 保存cookie
+        await self.save_account_state(context)  # 保存cookie
         tencent_logger.success('  [-]cookie更新完毕！')
         await asyncio.sleep(2)  # 这里延迟是为了方便眼睛直观的观看
         # 关闭浏览器上下文和浏览器实例
@@ -21,6 +21,8 @@ class BarkNotifier:
         """
         self.bark_key = config.bark_key
         self.bark_server = bark_server.rstrip('/')
+        # 复用连接, 同一实例多次推送时避免重复 TLS 握手
+        self.session = requests.Session()
 
     def send(
             self,
@@ -111,7 +113,7 @@ class BarkNotifier:
 
         try:
             # 发送 GET 请求
-            response = requests.get(push_url, params=params, timeout=10)
+            response = self.session.get(push_url, params=params, timeout=10)
 
             # 调试输出（可选，如果需要静默模式可以注释掉）
             # print(f"📡 实际请求 URL: {response.url}")
@@ -135,6 +135,11 @@ class ConfigLoader:
         """阿里云百炼 API Key"""
         return self.get_required('DASHSCOPE_API_KEY')
 
+    @property
+    def ai_concurrency(self) -> int:
+        """同时进行的 AI 分析数"""
+        return max(1, self.get_int('AI_CONCURRENCY', 4))
+
     @property
     def schedule_interval(self) -> int:
         """调度间隔 (分钟)"""
@@ -166,6 +171,11 @@ class ConfigLoader:
         """上传后是否删除"""
         return self.get_bool('DELETE_AFTER_UPLOAD', False)
 
+    @property
+    def upload_concurrency(self) -> int:
+        """同时上传的视频数 (默认逐个上传)"""
+        return max(1, self.get_int('UPLOAD_CONCURRENCY', 1))
+
     def get_path(self, key: str) -> Path:
         """获取路径配置
         
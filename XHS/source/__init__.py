@@ -1,10 +1,23 @@
 # from .CLI import cli
-from .TUI import XHSDownloader
-from .application import XHS
-from .module import Settings
+from importlib import import_module
 
 __all__ = [
     "XHS",
     "XHSDownloader",
     "Settings",
 ]
+
+# 按需导入: 只用到下载引擎时不加载 TUI (textual) 等重量级依赖，缩短脚本启动时间
+_LAZY_ATTRS = {
+    "XHSDownloader": ".TUI",
+    "XHS": ".application",
+    "Settings": ".module",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -13,6 +13,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List, Dict, Any
+import aiofiles
 from dotenv import load_dotenv
 from XHS.source import XHS
 from XHS.source.expansion import Namespace
@@ -144,6 +145,9 @@ class XHSDownloader:
         self.download_video = download_video
         self.skip_existing = skip_existing
         
+        # 常驻 XHS 实例 (由 open()/close() 管理)，批量下载时复用连接池和下载记录
+        self._xhs = None
+        
         # 创建下载目录
         self.download_dir.mkdir(parents=True, exist_ok=True)
         
@@ -270,7 +274,14 @@ class XHSDownloader:
             XHSContent 对象，包含笔记信息和下载结果
             失败返回 None
         """
-        async with XHS(
+        if self._xhs is not None:
+            return await self._download_with(self._xhs, url, save_text)
+        async with self._create_xhs() as xhs:
+            return await self._download_with(xhs, url, save_text)
+
+    def _create_xhs(self) -> XHS:
+        """创建用于下载的 XHS 实例"""
+        return XHS(
             work_path=str(self.download_dir.parent),
             folder_name=self.download_dir.name,
             cookie=self.cookie,
@@ -284,43 +295,74 @@ class XHSDownloader:
             video_download=self.download_video,
             folder_mode=True,
             author_archive=True,
-        ) as xhs:
-            try:
-                # 下载并获取数据
-                result_list = await xhs.extract(
-                    url,
-                    download=True,
-                    data=True
-                )
-                
-                if not result_list or len(result_list) == 0:
-                    # 检查 URL 是否包含 xsec_token
-                    if 'xsec_token' not in url:
-                        print(f"[错误] 无法获取笔记数据（URL 缺少 xsec_token）: {url}")
-                        print(f"       下载他人笔记必须携带 xsec_token 参数，请使用带 token 的完整链接")
-                    else:
-                        print(f"[错误] 无法获取笔记数据（API 返回空，可能 Cookie 失效或被限流）: {url}")
-                    return None
-                
-                result = result_list[0]
-                if not result or not isinstance(result, dict):
-                    print(f"[错误] 笔记数据格式错误（收到: {type(result).__name__}）: {url}")
-                    return None
-                
-                # 解析内容
-                content = self._parse_result(result, url)
-                
-                # 保存文案
-                if save_text and content:
-                    await self._save_text(content)
-                
-                print(f"[成功] 下载完成: {content.title[:30]}...")
-                return content
-                
-            except Exception as e:
-                print(f"[错误] 下载失败: {url}, 错误: {e}")
+        )
+
+    async def open(self) -> "XHSDownloader":
+        """
+        打开常驻 XHS 实例，之后的 download() 共用同一组 HTTP 连接池和下载记录数据库，
+        避免每个笔记都重新建立连接。用完需调用 close()，或使用 async with downloader。
+        """
+        if self._xhs is None:
+            xhs = self._create_xhs()
+            await xhs.__aenter__()
+            self._xhs = xhs
+        return self
+
+    async def close(self):
+        """关闭常驻 XHS 实例"""
+        if self._xhs is not None:
+            xhs, self._xhs = self._xhs, None
+            await xhs.__aexit__(None, None, None)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _download_with(
+        self,
+        xhs: XHS,
+        url: str,
+        save_text: bool,
+    ) -> Optional[XHSContent]:
+        """使用给定的 XHS 实例下载笔记"""
+        try:
+            # 下载并获取数据
+            result_list = await xhs.extract(
+                url,
+                download=True,
+                data=True
+            )
+            
+            if not result_list or len(result_list) == 0:
+                # 检查 URL 是否包含 xsec_token
+                if 'xsec_token' not in url:
+                    print(f"[错误] 无法获取笔记数据（URL 缺少 xsec_token）: {url}")
+                    print(f"       下载他人笔记必须携带 xsec_token 参数，请使用带 token 的完整链接")
+                else:
+                    print(f"[错误] 无法获取笔记数据（API 返回空，可能 Cookie 失效或被限流）: {url}")
                 return None
-    
+            
+            result = result_list[0]
+            if not result or not isinstance(result, dict):
+                print(f"[错误] 笔记数据格式错误（收到: {type(result).__name__}）: {url}")
+                return None
+            
+            # 解析内容
+            content = self._parse_result(result, url)
+            
+            # 保存文案
+            if save_text and content:
+                await self._save_text(content)
+            
+            print(f"[成功] 下载完成: {content.title[:30]}...")
+            return content
+            
+        except Exception as e:
+            print(f"[错误] 下载失败: {url}, 错误: {e}")
+            return None
+
     async def get_info(self, url: str) -> Optional[XHSContent]:
         """
         仅获取小红书笔记信息，不下载文件
@@ -384,16 +426,17 @@ class XHSDownloader:
         results = []
         total = len(urls)
         
-        for i, url in enumerate(urls, 1):
-            print(f"[进度] 正在下载 {i}/{total}: {url[:50]}...")
-            
-            content = await self.download(url, save_text=save_text)
-            if content:
-                results.append(content)
-            
-            # 间隔延迟
-            if i < total:
-                await asyncio.sleep(delay)
+        async with self:
+            for i, url in enumerate(urls, 1):
+                print(f"[进度] 正在下载 {i}/{total}: {url[:50]}...")
+                
+                content = await self.download(url, save_text=save_text)
+                if content:
+                    results.append(content)
+                
+                # 间隔延迟
+                if i < total:
+                    await asyncio.sleep(delay)
         
         print(f"[完成] 批量下载完成，成功: {len(results)}/{total}")
         return results
@@ -454,8 +497,9 @@ class XHSDownloader:
 点赞: {content.likes} | 收藏: {content.collects} | 评论: {content.comments} | 分享: {content.shares}
 """
         
-        # 写入文件
-        filepath.write_text(text_content, encoding="utf-8")
+        # 写入文件 (异步写入，并发下载时不阻塞事件循环)
+        async with aiofiles.open(filepath, "w", encoding="utf-8") as f:
+            await f.write(text_content)
         content.download_path = save_dir
         print(f"[保存] 文案已保存: {filepath}")
     
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Playwright 调用栈采集补丁
+
+playwright-python 每次 API 调用 (evaluate / click / goto ...) 都会执行 inspect.stack()
+收集调用方堆栈，仅用于报错定位和 trace 元数据。在大量循环调用的抓取场景中，
+这部分开销可占到 Python 侧耗时的相当比例。
+
+apply() 将 playwright 内部连接模块看到的 inspect.stack 替换为返回空列表，
+代价是 Playwright 报错信息中不再包含调用方源码位置。
+
+使用方式 (设置环境变量后由 standalone_xhs.py 自动启用):
+  PW_INSPECT_STACK=0 python standalone_xhs.py --user-url "xxx"
+"""
+import inspect
+import types
+
+_applied = False
+
+
+class _NoStackInspect(types.ModuleType):
+    """inspect 模块代理: stack() 返回空列表，其余属性原样转发"""
+
+    def __getattr__(self, name):
+        return getattr(inspect, name)
+
+    @staticmethod
+    def stack(context: int = 1) -> list:
+        return []
+
+
+def apply() -> bool:
+    """
+    打补丁 (可重复调用)
+
+    Returns:
+        是否已生效；未安装 Playwright 或内部结构不兼容时返回 False
+    """
+    global _applied
+    if _applied:
+        return True
+
+    try:
+        from playwright._impl import _connection
+    except ImportError:
+        return False
+
+    if getattr(_connection, 'inspect', None) is not inspect:
+        # 版本不兼容，保持原样
+        return False
+
+    _connection.inspect = _NoStackInspect('inspect')
+    _applied = True
+    return True
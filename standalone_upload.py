@@ -2,19 +2,22 @@
 独立视频号上传工具
 功能: 上传 Upload/videos 目录下已去重的视频到视频号
 """
-import time
-import json
+import orjson
 import shutil
 import asyncio
+import argparse
+import hashlib
 import os
+import random
 import re
 import cv2
+import ffmpeg
 import sys
 import dashscope
 import traceback
 from pathlib import Path
 from dashscope import MultiModalConversation
-from typing import Dict
+from typing import Dict, List, Optional, Set, Tuple
 from Upload.utils.log import logger as logging
 from Upload.utils.utils_common import setup_project_paths, setup_logging
 from Upload.uploader.tencent_uploader.main import TencentVideo
@@ -30,31 +33,169 @@ setup_project_paths()
 # 配置日志
 logger = setup_logging('logs/standalone_upload.log')
 
+# 元数据文件解析: 单次匹配 "标题:"/"标签:" 行 (兼容全角冒号, 注释行天然不匹配)
+# 值必须以非空白字符开头, 内容被清空的行 (如 "标题: ") 视为未填写
+_META_RE = re.compile(r'^[ \t]*(?P<k>标题|标签)[:：][ \t]*(?P<v>\S.*?)\s*$', re.M)
+
+# 文件名清洗: 非中文、非字母、非数字的字符
+_NAME_RE = re.compile(r'[^\u4e00-\u9fa5a-zA-Z0-9]')
+
+# AI 分析系统提示词
+_SYSTEM_PROMPT = """
+你是一位拥有10年经验的资深短视频运营专家,擅长跨平台内容重构与爆款公式设计。
+你会分析视频内容,结合中国用户心理,利用悬念前置、感官刺激、认知冲突等钩子设计爆款中文标题和热门中文标签。
+标题中可以适当使用1-2个表情图标,标签数量大于8个。
+严格按照以下 JSON 格式输出结果:
+{
+    "title": "标题",
+    "tag": "标签1,标签2,标签3,标签4,标签5,标签6,标签7,标签8"
+}
+"""
+_SYSTEM_MESSAGE = {"role": "system", "content": [{"type": "text", "text": _SYSTEM_PROMPT}]}
 
-@contextmanager
-def suppress_stderr():
-    """Suppress stderr/stdout from C libraries"""
-    try:
-        # Save stderr
-        original_stderr_fd = 2  # Standard stderr fd
-        saved_stderr_fd = os.dup(original_stderr_fd)
+# 流式输出超过该长度仍未出现 JSON 对象时提前失败
+_JSON_PREFIX_LIMIT = 2048
+
+# 流式响应中缺少 choices 时的默认值
+_EMPTY_CHOICES = [{}]
+
+# AI 分析缓存最多保留的条目数 (超出时淘汰最早写入的)
+_AI_CACHE_LIMIT = 500
+
+# 旧版本在 AI 分析完成前写入的占位内容 (遗留文件需要重新分析)
+METADATA_PLACEHOLDER = "正在AI分析中..."
+
+_METADATA_TEMPLATE = """标题: {title}
+标签: {tag}
+
+# ========== 使用说明 ==========
+# 第一行是标题 (格式: 标题: xxx)
+# 第二行是标签 (格式: 标签: tag1,tag2,tag3)
+# 请根据视频内容修改标题和标签
+# 修改完成后保存文件即可
+# ==============================
+"""
 
-        # Open devnull
-        devnull = os.open(os.devnull, os.O_WRONLY)
 
-        # Replace stderr with devnull
-        os.dup2(devnull, original_stderr_fd)
+def format_metadata(title: str, tag: str) -> str:
+    """生成元数据文件内容"""
+    return _METADATA_TEMPLATE.format(title=title, tag=tag)
 
+
+def scan_videos(
+        directory: Path,
+        with_stat: bool = True
+) -> Tuple[List[Tuple[Path, Optional[os.stat_result]]], Set[str]]:
+    """单次 scandir 扫描目录
+
+    Args:
+        directory: 目录路径
+        with_stat: 是否获取 .mp4 文件的 stat 信息 (只需要文件名时传 False, 省去每个文件一次 stat)
+
+    Returns:
+        (.mp4 文件及其 stat 信息列表, 目录下所有文件名集合)
+    """
+    videos = []
+    names = set()
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            names.add(entry.name)
+            if entry.name.lower().endswith('.mp4'):
+                videos.append((Path(entry.path), entry.stat() if with_stat else None))
+    videos.sort(key=lambda item: item[0].name)
+    return videos, names
+
+
+def clean_video_filename(video_file: Path) -> str:
+    """清洗视频文件名: 去除特殊符号和空格, 只保留中文、英文、数字
+
+    清洗后为空(全是特殊符号)时保留原名
+    """
+    new_stem = _NAME_RE.sub('', video_file.stem)
+    if not new_stem:
+        logging.warning(f"文件名清洗后为空: {video_file.stem}, 使用原名")
+        new_stem = video_file.stem
+    return f"{new_stem}{video_file.suffix}"
+
+
+def video_digest(video_path: Path, chunk_size: int = 4 * 1024 * 1024) -> str:
+    """视频内容指纹: 文件大小 + 首尾各 4MB 数据的 blake2b 摘要 (无需读取整个文件)"""
+    size = video_path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(video_path, 'rb') as f:
+        digest.update(f.read(chunk_size))
+        if size > chunk_size:
+            f.seek(max(chunk_size, size - chunk_size))
+            digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+
+def copy_video_file(src: Path, dst: Path, size: int):
+    """复制视频文件并保留元数据
+
+    Linux 下优先使用 copy_file_range: 数据不经过用户态, NFS/SMB/btrfs 等文件系统
+    还可以在服务端或以 reflink 方式完成复制; 不支持时回退到 shutil.copy2
+    """
+    if hasattr(os, 'copy_file_range'):
         try:
-            yield
-        finally:
-            # Restore stderr
-            os.dup2(saved_stderr_fd, original_stderr_fd)
-            os.close(saved_stderr_fd)
-            os.close(devnull)
-    except Exception:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError as e:
+            logging.debug(f"copy_file_range 不可用, 回退到 shutil.copy2: {e}")
+    shutil.copy2(src, dst)
+
+
+def _is_placeholder(metadata_file: Path) -> bool:
+    """元数据文件的标题/标签行是否仍为 AI 分析占位内容 (上次运行中断时遗留)"""
+    try:
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            head = f.readline() + f.readline()
+    except OSError:
+        return False
+    return METADATA_PLACEHOLDER in head
+
+
+def _unlink_files(*paths: Path):
+    """删除文件 (在线程中执行, 避免大文件删除阻塞事件循环)"""
+    for path in paths:
+        path.unlink()
+
+
+# suppress_stderr 复用的 devnull 句柄 (首次使用时打开)
+_DEVNULL_FD = None
+
+
+@contextmanager
+def suppress_stderr():
+    """Suppress stderr from C libraries (fd 级重定向, 复用同一个 devnull 句柄)"""
+    global _DEVNULL_FD
+    try:
+        if _DEVNULL_FD is None:
+            _DEVNULL_FD = os.open(os.devnull, os.O_WRONLY)
+        # Save stderr and replace it with devnull
+        saved_stderr_fd = os.dup(2)
+        os.dup2(_DEVNULL_FD, 2)
+    except OSError:
         # If any OS error, just run the code
         yield
+        return
+
+    try:
+        yield
+    finally:
+        # Restore stderr
+        os.dup2(saved_stderr_fd, 2)
+        os.close(saved_stderr_fd)
 
 
 class StandaloneUploadConfig:
@@ -68,11 +209,16 @@ class StandaloneUploadConfig:
 
         # 从配置文件加载 AI 配置
         self.DASHSCOPE_API_KEY = config.dashscope_api_key
+        self.AI_CONCURRENCY = config.ai_concurrency
 
         # 从配置文件加载上传配置
         self.CATEGORY = config.upload_category
 
         self.DELETE_AFTER_UPLOAD = config.delete_after_upload
+        self.UPLOAD_CONCURRENCY = config.upload_concurrency
+
+        # Bark 通知配置 (未配置时不发送通知)
+        self.BARK_KEY = config.get('BARK_KEY', '')
 
         # nas目录配置
         self.NAS_DIR = config.nas_dir
@@ -99,14 +245,126 @@ class StandaloneUploadConfig:
             logging.info("已启用 Docker 模拟模式")
 
 
+class _JsonObjectTracker:
+    """增量追踪流式文本中第一个 JSON 对象的边界 (忽略字符串中的括号)"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+        self.started = False
+        self._start = 0
+        self._end = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> bool:
+        """追加一段文本, JSON 对象闭合时返回 True"""
+        offset = self.size
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self.started
+            elif ch == '{':
+                if not self.started:
+                    self.started = True
+                    self._start = offset + i
+                self._depth += 1
+            elif ch == '}' and self.started:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = offset + i + 1
+                    return True
+        return False
+
+    @property
+    def text(self) -> str:
+        """JSON 对象文本 (对象未闭合时返回全部已接收文本)"""
+        full = ''.join(self._chunks)
+        if self._end > 0:
+            return full[self._start:self._end]
+        return full
+
+
 class AIAnalyzer:
     """AI 分析类: 使用阿里百炼 AI 分析视频生成标题和标签"""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_file: Path = Path('logs/ai_cache.json'), use_cache: bool = True):
         self.api_key = api_key
         dashscope.api_key = api_key
 
-    def analyze_video(self, video_path: Path, original_title: str = "") -> Dict[str, str]:
+        # AI 分析结果缓存 (按视频内容指纹索引, 同一视频重复拉取/重跑时不再调用 AI)
+        # use_cache=False 时不读取缓存, 重新分析并用新结果覆盖旧条目
+        self.cache_file = cache_file
+        self.use_cache = use_cache
+        self.cache = self._load_cache()
+        self._cache_lock = asyncio.Lock()
+
+    def _load_cache(self) -> dict:
+        """加载 AI 分析结果缓存"""
+        if self.cache_file.exists():
+            try:
+                return orjson.loads(self.cache_file.read_bytes())
+            except Exception as e:
+                logging.warning(f"加载 AI 分析缓存失败, 将重新分析: {e}")
+        return {}
+
+    async def _store_cache(self, key: str, result: Dict[str, str]):
+        """写入 AI 分析结果缓存"""
+        async with self._cache_lock:
+            # 重新写入的条目移到末尾, 超出上限时淘汰最早的条目
+            self.cache.pop(key, None)
+            self.cache[key] = {'title': result['title'], 'tag': result['tag']}
+            while len(self.cache) > _AI_CACHE_LIMIT:
+                del self.cache[next(iter(self.cache))]
+            data = orjson.dumps(self.cache)
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                await asyncio.to_thread(self.cache_file.write_bytes, data)
+            except Exception as e:
+                logging.error(f"保存 AI 分析缓存失败: {e}")
+
+    @staticmethod
+    def _call_sync(messages: list) -> str:
+        """同步调用 AI 接口, 返回输出中的 JSON 文本
+
+        边接收边追踪 JSON 对象边界: 对象闭合后立即停止读取; 输出很长仍未出现 "{" 时
+        直接报错进入重试, 不必等待整个流结束
+        """
+        responses = MultiModalConversation.call(
+            model="qwen-vl-max-latest",
+            messages=messages,
+            stream=True,
+            incremental_output=True,
+            timeout=600  # 增加超时时间到 10 分钟, 适应大文件
+        )
+
+        tracker = _JsonObjectTracker()
+        try:
+            for response in responses:
+                # 出错的分片 output 为 None, 用 get 链跳过, 不在循环内抛异常
+                choices = (response.get("output") or {}).get("choices") or _EMPTY_CHOICES
+                content = (choices[0].get("message") or {}).get("content")
+                if content and isinstance(content, list) and content[0].get("text"):
+                    if tracker.feed(content[0]["text"]):
+                        break
+                    if not tracker.started and tracker.size > _JSON_PREFIX_LIMIT:
+                        raise ValueError("AI 输出中未找到 JSON 对象")
+        finally:
+            close = getattr(responses, 'close', None)
+            if close:
+                close()
+        return tracker.text
+
+    async def analyze_video(self, video_path: Path, original_title: str = "") -> Optional[Dict[str, str]]:
         """使用 AI 分析视频,生成标题和标签 (带重试机制)
 
         Args:
@@ -114,32 +372,32 @@ class AIAnalyzer:
             original_title: 原始标题 (可选)
 
         Returns:
-            包含 title 和 tag 的字典
+            包含 title 和 tag 的字典, 所有重试均失败时返回 None
         """
+        try:
+            cache_key = await asyncio.to_thread(video_digest, video_path)
+            if original_title:
+                cache_key += f":{original_title}"
+        except OSError as e:
+            logging.warning(f"计算视频指纹失败, 跳过缓存: {e}")
+            cache_key = None
+
+        cached = self.cache.get(cache_key) if cache_key and self.use_cache else None
+        if cached:
+            logging.info(f"✅ 命中 AI 分析缓存: {video_path.name}")
+            return dict(cached)
+
         max_retries = 5
-        retry_delay = 2
+        # 截断指数退避 + 随机抖动, 避免限流时同步重试
+        backoff_base = 1.0
+        backoff_cap = 30.0
 
         for attempt in range(1, max_retries + 1):
             try:
                 logging.info(f"AI 分析视频: {video_path.name} (第 {attempt}/{max_retries} 次尝试)")
 
                 messages = [
-                    {
-                        "role": "system",
-                        "content": [{
-                            "type": "text",
-                            "text": """
-                            你是一位拥有10年经验的资深短视频运营专家,擅长跨平台内容重构与爆款公式设计。
-                            你会分析视频内容,结合中国用户心理,利用悬念前置、感官刺激、认知冲突等钩子设计爆款中文标题和热门中文标签。
-                            标题中可以适当使用1-2个表情图标,标签数量大于8个。
-                            严格按照以下 JSON 格式输出结果:
-                            {
-                                "title": "标题",
-                                "tag": "标签1,标签2,标签3,标签4,标签5,标签6,标签7,标签8"
-                            }
-                            """
-                        }]
-                    },
+                    _SYSTEM_MESSAGE,
                     {
                         "role": "user",
                         "content": [
@@ -149,31 +407,14 @@ class AIAnalyzer:
                     }
                 ]
 
-                responses = MultiModalConversation.call(
-                    model="qwen-vl-max-latest",
-                    messages=messages,
-                    stream=True,
-                    incremental_output=True,
-                    timeout=600  # 增加超时时间到 10 分钟, 适应大文件
-                )
-
-                full_content = []
-                for response in responses:
-                    try:
-                        content = response["output"]["choices"][0]["message"]["content"]
-                        if content and isinstance(content, list) and "text" in content[0]:
-                            text_content = content[0]["text"]
-                            full_content.append(text_content)
-                    except (KeyError, IndexError) as error:
-                        logging.debug(f"解析响应时出错: {error}")
-                    except Exception as e:
-                        logging.debug(f"未知错误: {e}")
-
-                result_text = ''.join(full_content)
-                result = json.loads(result_text)
+                # SDK 调用和流式读取是阻塞的, 放到线程中执行
+                result_text = await asyncio.to_thread(self._call_sync, messages)
+                result = orjson.loads(result_text)
 
                 if result.get('title') and result.get('tag'):
                     logging.info(f"✅ AI 分析完成")
+                    if cache_key:
+                        await self._store_cache(cache_key, result)
                     return result
                 else:
                     raise ValueError("AI 返回结果格式不正确")
@@ -181,25 +422,24 @@ class AIAnalyzer:
             except Exception as e:
                 logging.warning(f"⚠️ AI 分析失败 (第 {attempt} 次): {str(e)}")
                 if attempt < max_retries:
-                    logging.info(f"等待 {retry_delay} 秒后重试...")
-                    # 改用 time.sleep
-                    time.sleep(retry_delay)
+                    retry_delay = min(backoff_cap, backoff_base * 2 ** (attempt - 1)) + random.random()
+                    logging.info(f"等待 {retry_delay:.1f} 秒后重试...")
+                    await asyncio.sleep(retry_delay)
                 else:
                     logging.error(f"❌ AI 分析最终失败: {video_path.name}")
 
-        # 所有重试失败后返回默认值
-        return {
-            'title': video_path.stem,
-            'tag': '生活,日常,分享,有趣,推荐,精彩,热门,必看'
-        }
+        return None
 
 
 class VideoUploader:
     """视频上传类 (支持人工审核)"""
 
-    def __init__(self, config: StandaloneUploadConfig):
+    def __init__(self, config: StandaloneUploadConfig, use_ai_cache: bool = True):
         self.config = config
-        self.ai_analyzer = AIAnalyzer(config.DASHSCOPE_API_KEY)
+        self.ai_analyzer = AIAnalyzer(config.DASHSCOPE_API_KEY, use_cache=use_ai_cache)
+        self.notifier = BarkNotifier(config.BARK_KEY) if config.BARK_KEY else None
+        # 后台发送中的通知任务, 运行结束前统一等待
+        self._notify_tasks = []
 
         # 如果启用了 Docker 模拟模式,设置环境变量
         if self.config.DOCKER_MODE:
@@ -209,16 +449,55 @@ class VideoUploader:
         # 初始化上传历史记录
         self.history_file = Path('logs/uploaded_history.txt')
         self.uploaded_history = self._load_history()
+        self._history_fp = None
+
+        # NAS 视频宽度探测缓存
+        self.probe_cache_file = Path('logs/nas_probe_cache.json')
+        self.probe_cache = self._load_probe_cache()
+        self._probe_cache_dirty = False
 
-    def scan_video_width(self, video_path: Path) -> int:
-        """获取视频宽度
+    def scan_video_width(self, video_path: Path, video_stat: Optional[os.stat_result] = None) -> int:
+        """获取视频宽度 (按 路径+大小+修改时间 缓存, 同一文件不重复探测)
 
         Args:
             video_path: 视频文件路径
+            video_stat: 视频文件 stat 信息 (已由目录扫描得出时传入, 避免重复 stat)
 
         Returns:
             int: 视频宽度, 如果获取失败则返回 0
         """
+        if video_stat is None:
+            video_stat = video_path.stat()
+        key = f"{video_path}:{video_stat.st_size}:{int(video_stat.st_mtime)}"
+
+        cached = self.probe_cache.get(key)
+        if cached is not None:
+            return cached['width']
+
+        width = self._probe_video_width(video_path)
+        if width:
+            self.probe_cache[key] = {'width': width}
+            self._probe_cache_dirty = True
+        return width
+
+    def _probe_video_width(self, video_path: Path) -> int:
+        """使用 ffprobe 获取视频宽度 (只读取容器头信息, 不解码画面)"""
+        try:
+            probe = ffmpeg.probe(str(video_path), select_streams='v:0')
+            streams = probe.get('streams')
+            return int(streams[0]['width']) if streams else 0
+        except FileNotFoundError:
+            # 未找到 ffprobe, 回退到 OpenCV
+            return self._scan_video_width_cv2(video_path)
+        except ffmpeg.Error as e:
+            logging.error(f"获取视频宽度失败: {e.stderr.decode(errors='ignore').strip()}")
+            return 0
+        except Exception as e:
+            logging.error(f"获取视频宽度失败: {e}")
+            return 0
+
+    def _scan_video_width_cv2(self, video_path: Path) -> int:
+        """使用 OpenCV 获取视频宽度 (ffprobe 不可用时的回退方案)"""
         try:
             with suppress_stderr():
                 cap = cv2.VideoCapture(str(video_path))
@@ -227,39 +506,70 @@ class VideoUploader:
             width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             cap.release()
             return width
-        except ImportError:
-            logging.warning("未安装 opencv-python, 无法获取视频分辨率")
-            return 0
         except Exception as e:
             logging.error(f"获取视频宽度失败: {e}")
             return 0
 
+    def _load_probe_cache(self) -> dict:
+        """加载视频宽度探测缓存"""
+        if self.probe_cache_file.exists():
+            try:
+                return orjson.loads(self.probe_cache_file.read_bytes())
+            except Exception as e:
+                logging.warning(f"加载探测缓存失败, 将重新探测: {e}")
+        return {}
+
+    def _save_probe_cache(self):
+        """保存视频宽度探测缓存 (仅在有新增时写入)"""
+        if not self._probe_cache_dirty:
+            return
+        try:
+            self.probe_cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self.probe_cache_file.write_bytes(orjson.dumps(self.probe_cache))
+            self._probe_cache_dirty = False
+        except Exception as e:
+            logging.error(f"保存探测缓存失败: {e}")
+
     def _load_history(self) -> set:
         """加载已上传视频的历史记录"""
         history = set()
         if self.history_file.exists():
             try:
+                lines_read = 0
                 with open(self.history_file, 'r', encoding='utf-8') as f:
                     for line in f:
                         line = line.strip()
                         if line:
+                            lines_read += 1
                             history.add(line)
                 logging.info(f"已加载 {len(history)} 条上传历史记录")
+
+                # 重复记录过多时压缩文件 (去重 + 排序), 避免多次重跑后文件无限增长
+                if lines_read > len(history) * 1.5:
+                    self.history_file.write_text(''.join(f"{name}\n" for name in sorted(history)), encoding='utf-8')
+                    logging.info(f"已压缩上传历史记录: {lines_read} -> {len(history)} 行")
             except Exception as e:
                 logging.error(f"加载历史记录失败: {e}")
         return history
 
     def _save_history(self, filename: str):
-        """保存上传记录"""
+        """保存上传记录 (复用同一个行缓冲的追加句柄)"""
         try:
-            # 确保目录存在
-            self.history_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.history_file, 'a', encoding='utf-8') as f:
-                f.write(f"{filename}\n")
+            if self._history_fp is None:
+                # 确保目录存在
+                self.history_file.parent.mkdir(parents=True, exist_ok=True)
+                self._history_fp = open(self.history_file, 'a', encoding='utf-8', buffering=1)
+            self._history_fp.write(f"{filename}\n")
             self.uploaded_history.add(filename)
         except Exception as e:
             logging.error(f"保存历史记录失败: {e}")
 
+    def close(self):
+        """关闭上传历史记录文件"""
+        if self._history_fp is not None:
+            self._history_fp.close()
+            self._history_fp = None
+
     def fetch_from_nas(self, nas_dir: Path, target_dir: Path):
         """从 NAS 目录拉取视频文件到本地
 
@@ -274,77 +584,69 @@ class VideoUploader:
         logging.info(f"正在从 NAS 拉取视频: {nas_dir} -> {target_dir}")
 
         # 查找所有 .mp4 文件
-        video_files = list(nas_dir.glob('*.mp4'))
+        video_files, _ = scan_videos(nas_dir)
         if not video_files:
             logging.info("NAS 目录中未找到视频文件")
             return
 
+        _, local_names = scan_videos(target_dir, with_stat=False)
+
+        # 先按清洗后文件名过滤掉已上传/已在本地的视频, 只对剩余文件做大小和宽度检查
+        candidates = []
+        skipped = 0
+        for video_file, video_stat in video_files:
+            new_filename = clean_video_filename(video_file)
+            if new_filename in self.uploaded_history or new_filename in local_names:
+                skipped += 1
+                continue
+            candidates.append((video_file, video_stat, new_filename))
+
+        if skipped:
+            logging.info(f"跳过 {skipped} 个已上传或本地已存在的视频")
+
         count = 0
-        for video_file in video_files:
+        for video_file, video_stat, new_filename in candidates:
             if count >= 1:
                 logging.info("已达到单次拉取数量限制(1个),停止拉取")
                 break
 
-            # 处理文件名: 去除特殊符号和空格
-            # 保留: 中文, 英文, 数字
-            stem = video_file.stem
-            suffix = video_file.suffix
-
-            # 使用正则替换非中文、非字母、非数字的字符为空
-            new_stem = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9]', '', stem)
-
-            # 如果处理后文件名为空(全是特殊符号),则保留原名或使用默认名
-            if not new_stem:
-                logging.warning(f"文件名清洗后为空: {stem}, 使用原名")
-                new_stem = stem
-
-            new_filename = f"{new_stem}{suffix}"
-
-            # 检查是否已上传过
-            if new_filename in self.uploaded_history:
-                logging.info(f"文件已在上传历史中,跳过: {new_filename}")
-                continue
-
             target_file = target_dir / new_filename
 
-            if not target_file.exists():
-                # 获取文件大小 (MB)
-                file_size = video_file.stat().st_size
-                file_size_mb = file_size / (1024 * 1024)
+            # 获取文件大小 (MB)
+            file_size = video_stat.st_size
+            file_size_mb = file_size / (1024 * 1024)
 
-                logging.info(f"正在检查视频: {video_file.name}")
+            logging.info(f"正在检查视频: {video_file.name}")
 
-                # 预先检查文件大小,跳过过小的文件(可能是未下载完成或损坏的文件)
-                if file_size < 1024 * 1024:  # 小于 1MB
-                    logging.warning(f"文件过小({file_size_mb:.2f} MB), 跳过: {video_file.name}")
-                    continue
-
-                # 获取视频宽度
-                width = self.scan_video_width(video_file)
+            # 预先检查文件大小,跳过过小的文件(可能是未下载完成或损坏的文件)
+            if file_size < 1024 * 1024:  # 小于 1MB
+                logging.warning(f"文件过小({file_size_mb:.2f} MB), 跳过: {video_file.name}")
+                continue
 
-                # 自动过滤: 只保留宽度为 720 的视频
-                if width != 720:
-                    logging.info(f"跳过非 720p 视频: {video_file.name} (宽度: {width})")
-                    continue
+            # 获取视频宽度
+            width = self.scan_video_width(video_file, video_stat)
 
-                logging.info(f"发现符合条件的视频: {video_file.name}")
-                logging.info(f"清洗后名: {new_filename}")
-                logging.info(f"文件大小: {file_size_mb:.2f} MB")
-                logging.info(f"视频宽度: {width}")
+            # 自动过滤: 只保留宽度为 720 的视频
+            if width != 720:
+                logging.info(f"跳过非 720p 视频: {video_file.name} (宽度: {width})")
+                continue
 
-                try:
-                    logging.info(f"正在复制: {video_file.name} -> {new_filename}")
-                    shutil.copy2(video_file, target_file)
-                    count += 1
-                except Exception as e:
-                    logging.error(f"复制失败 {video_file.name}: {e}")
+            logging.info(f"发现符合条件的视频: {video_file.name}")
+            logging.info(f"清洗后名: {new_filename}")
+            logging.info(f"文件大小: {file_size_mb:.2f} MB")
+            logging.info(f"视频宽度: {width}")
 
-                # 复制成功后直接跳出（因为只需要一个）
-                break
+            try:
+                logging.info(f"正在复制: {video_file.name} -> {new_filename}")
+                copy_video_file(video_file, target_file, file_size)
+                count += 1
+            except Exception as e:
+                logging.error(f"复制失败 {video_file.name}: {e}")
 
-            else:
-                logging.debug(f"文件已存在,跳过: {new_filename}")
+            # 复制成功后直接跳出（因为只需要一个）
+            break
 
+        self._save_probe_cache()
         logging.info(f"✅ 从 NAS 拉取完成,新增 {count} 个视频")
 
     async def setup_account(self) -> bool:
@@ -387,57 +689,57 @@ class VideoUploader:
             logging.error(traceback.format_exc())
             return False
 
-    def generate_metadata_file(self, video_path: Path) -> Path:
+    async def generate_metadata_file(
+            self,
+            video_path: Path,
+            metadata_exists: Optional[bool] = None,
+            allow_fallback: bool = True
+    ) -> Path:
         """为视频生成元数据文件 (标题和标签)
 
+        AI 分析完成后一次性写入最终内容; 分析中途中断时不会留下文件, 下次运行会重新分析。
+
         Args:
             video_path: 视频文件路径
+            metadata_exists: 元数据文件是否已存在 (已由目录扫描得出时传入, 避免重复 stat)
+            allow_fallback: AI 分析失败时是否写入默认标题/标签 (仅在会经过人工审核时使用)
 
         Returns:
             元数据文件路径
+
+        Raises:
+            RuntimeError: AI 分析失败且不允许使用默认值
         """
         metadata_file = video_path.with_suffix('.txt')
+        if metadata_exists is None:
+            metadata_exists = metadata_file.exists()
 
-        # 如果文件已存在,说明已经生成过或用户已修改,直接返回
-        if metadata_file.exists():
+        # 如果文件已存在且不是占位内容,说明已经生成过或用户已修改,直接返回
+        if metadata_exists and not await asyncio.to_thread(_is_placeholder, metadata_file):
             logging.info(f"元数据文件已存在: {metadata_file.name}")
             return metadata_file
 
-        # 先创建文件,写入默认内容
+        # AI 分析视频生成标题和标签
         logging.info(f"正在为 {video_path.name} 生成元数据文件...")
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            f.write(f"标题: 正在AI分析中...\n")
-            f.write(f"标签: 正在AI分析中...\n")
-            f.write("\n")
-            f.write("# ========== 使用说明 ==========\n")
-            f.write("# 第一行是标题 (格式: 标题: xxx)\n")
-            f.write("# 第二行是标签 (格式: 标签: tag1,tag2,tag3)\n")
-            f.write("# 请根据视频内容修改标题和标签\n")
-            f.write("# 修改完成后保存文件即可\n")
-            f.write("# ==============================\n")
-
-        logging.info(
-            f"✅"
-            f" 已创建元数据文件: {metadata_file.name}"
+        logging.info(f"AI 分析视频: {video_path.name}")
+        ai_result = await self.ai_analyzer.analyze_video(video_path)
+        if ai_result is None:
+            if not allow_fallback:
+                raise RuntimeError("AI 分析失败, 未生成元数据")
+            # 使用默认值, 留给人工审核时修改
+            ai_result = {
+                'title': video_path.stem,
+                'tag': '生活,日常,分享,有趣,推荐,精彩,热门,必看'
+            }
+
+        # 一次性写入元数据文件
+        await asyncio.to_thread(
+            metadata_file.write_text,
+            format_metadata(ai_result['title'], ai_result['tag']),
+            encoding='utf-8'
         )
 
-        # AI 分析视频生成标题和标签
-        logging.info(f"AI 分析视频: {video_path.name}")
-        ai_result = self.ai_analyzer.analyze_video(video_path)
-
-        # 更新文件内容
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            f.write(f"标题: {ai_result['title']}\n")
-            f.write(f"标签: {ai_result['tag']}\n")
-            f.write("\n")
-            f.write("# ========== 使用说明 ==========\n")
-            f.write("# 第一行是标题 (格式: 标题: xxx)\n")
-            f.write("# 第二行是标签 (格式: 标签: tag1,tag2,tag3)\n")
-            f.write("# 请根据视频内容修改标题和标签\n")
-            f.write("# 修改完成后保存文件即可\n")
-            f.write("# ==============================\n")
-
-        logging.info(f"✅ AI 分析完成,已更新元数据文件")
+        logging.info(f"✅ AI 分析完成,已创建元数据文件: {metadata_file.name}")
         logging.info(f"标题: {ai_result['title']}")
         logging.info(f"标签: {ai_result['tag']}")
 
@@ -453,22 +755,19 @@ class VideoUploader:
             包含 title 和 tags 的字典
         """
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            text = metadata_file.read_text(encoding='utf-8')
 
             title = ""
             tags = []
 
-            for line in lines:
-                line = line.strip()
-                if line.startswith('#') or not line:
-                    continue
-
-                if line.startswith('标题:') or line.startswith('标题：'):
-                    title = line.split(':', 1)[1].strip() if ':' in line else line.split('：', 1)[1].strip()
-                elif line.startswith('标签:') or line.startswith('标签：'):
-                    tag_str = line.split(':', 1)[1].strip() if ':' in line else line.split('：', 1)[1].strip()
-                    tags = [tag.strip() for tag in tag_str.split(',') if tag.strip()]
+            # 取第一个标题行和第一个标签行, 两者都找到后不再继续匹配
+            for m in _META_RE.finditer(text):
+                if m['k'] == '标题':
+                    title = title or m['v']
+                elif not tags:
+                    tags = [tag.strip() for tag in m['v'].split(',') if tag.strip()]
+                if title and tags:
+                    break
 
             if not title:
                 raise ValueError("未找到标题")
@@ -495,7 +794,7 @@ class VideoUploader:
             logging.info(f"开始上传: {video_path.name}")
 
             # 读取元数据文件
-            metadata = self.read_metadata_file(metadata_file)
+            metadata = await asyncio.to_thread(self.read_metadata_file, metadata_file)
             title = metadata['title']
             tags = metadata['tags']
 
@@ -519,8 +818,7 @@ class VideoUploader:
             self._save_history(video_path.name)
 
             if self.config.DELETE_AFTER_UPLOAD:
-                video_path.unlink()
-                metadata_file.unlink()
+                await asyncio.to_thread(_unlink_files, video_path, metadata_file)
                 logging.info(f"已删除本地文件: {video_path.name} 和 {metadata_file.name}")
 
             return True
@@ -530,41 +828,76 @@ class VideoUploader:
             logging.error(f"错误信息: {e}")
             return False
 
-    def generate_all_metadata(self):
-        """为所有视频生成元数据文件"""
-        all_video_files = list(self.config.VIDEO_DIR.glob('*.mp4'))
+    def _pending_videos(self):
+        """列出尚未上传的视频
+
+        Returns:
+            (待处理视频列表, 视频目录下所有文件名集合)
+        """
+        all_video_files, names = scan_videos(self.config.VIDEO_DIR, with_stat=False)
 
         # 过滤已上传的视频
         video_files = []
-        for v in all_video_files:
+        for v, _ in all_video_files:
             if v.name in self.uploaded_history:
                 logging.info(f"跳过已上传视频: {v.name}")
             else:
                 video_files.append(v)
 
+        return video_files, names
+
+    def _metadata_jobs(self, video_files, names, allow_fallback: bool = True):
+        """为每个视频创建元数据生成协程 (受 AI_CONCURRENCY 限制)
+
+        每个协程返回 (视频路径, 元数据路径), 生成失败时元数据路径为 None;
+        allow_fallback=False 时 AI 分析失败也视为生成失败 (不经人工审核的流水线模式)
+        """
+        semaphore = asyncio.Semaphore(self.config.AI_CONCURRENCY)
+        total = len(video_files)
+
+        async def _generate(i, video_file):
+            async with semaphore:
+                logging.info(f"进度: [{i}/{total}] {video_file.name}")
+                try:
+                    metadata_file = await self.generate_metadata_file(
+                        video_file,
+                        metadata_exists=video_file.with_suffix('.txt').name in names,
+                        allow_fallback=allow_fallback
+                    )
+                    return video_file, metadata_file
+                except Exception as e:
+                    logging.error(f"生成元数据失败: {video_file.name} -> {e}")
+                    return video_file, None
+
+        return [_generate(i, v) for i, v in enumerate(video_files, 1)]
+
+    async def generate_all_metadata(self, pending=None):
+        """为所有视频生成元数据文件
+
+        Args:
+            pending: 预先扫描得到的 _pending_videos() 结果 (可选, 默认重新扫描)
+        """
+        video_files, names = pending if pending is not None else self._pending_videos()
+
         if not video_files:
             logging.info("没有需要生成元数据的视频文件")
             return []
 
         logging.info(f"找到 {len(video_files)} 个视频文件")
 
-        metadata_files = []
+        results = await asyncio.gather(*self._metadata_jobs(video_files, names))
+        return [item for item in results if item[1]]
 
-        for i, video_file in enumerate(video_files, 1):
-            logging.info(f"进度: [{i}/{len(video_files)}]")
-            try:
-                metadata_file = self.generate_metadata_file(video_file)
-                metadata_files.append((video_file, metadata_file))
-            except Exception as e:
-                logging.error(f"生成元数据失败: {video_file.name} -> {e}")
-
-        return metadata_files
+    def _notify_in_background(self, notify, *args):
+        """在后台线程发送通知, 不阻塞上传流程"""
+        if self.notifier is None:
+            return
+        self._notify_tasks.append(asyncio.create_task(asyncio.to_thread(notify, *args)))
 
     def notify_qr_login(self):
         """发送扫码登录通知"""
         try:
-            notifier = BarkNotifier(config.bark_key)
-            notifier.send(
+            self.notifier.send(
                 title="📱 需要扫码登录",
                 content="视频号上传工具需扫码登录，请并在控制台按回车继续",
                 level="timeSensitive",
@@ -578,8 +911,7 @@ class VideoUploader:
     def notify_manual_review(self, count):
         """发送人工审核通知"""
         try:
-            notifier = BarkNotifier(config.bark_key)
-            notifier.send(
+            self.notifier.send(
                 title="📝 等待人工审核",
                 content=f"已生成 {count} 个视频的元数据，请审核后在控制台按回车继续",
                 sound="minuet",
@@ -589,13 +921,15 @@ class VideoUploader:
         except Exception as e:
             logging.error(f"发送通知失败: {e}")
 
-    def notify_completion(self, count, success, fail):
-        """发送完成通知"""
+    def notify_completion(self, count, success, fail, failed_videos=None):
+        """发送完成通知 (失败的视频汇总在同一条通知中)"""
+        content = f"总计: {count} | 成功: {success} | 失败: {fail}"
+        if failed_videos:
+            content += " | 失败视频: " + ", ".join(failed_videos)
         try:
-            notifier = BarkNotifier(config.bark_key)
-            notifier.send(
+            self.notifier.send(
                 title="📤 视频上传完成",
-                content=f"总计: {count} | 成功: {success} | 失败: {fail}",
+                content=content,
                 group="视频上传",
                 sound="fanfare",
                 icon="https://api.iconify.design/mdi:cloud-upload-outline.svg"
@@ -603,30 +937,43 @@ class VideoUploader:
         except Exception as e:
             logging.error(f"发送通知失败: {e}")
 
-    async def upload_all_videos(self):
-        """上传所有视频 (优化后的流程)"""
+    async def upload_all_videos(self, review: bool = True):
+        """上传所有视频 (优化后的流程)
+
+        Args:
+            review: 是否在上传前等待人工审核; 为 False 时 AI 分析与上传流水线并行
+        """
+        try:
+            await self._upload_all_videos(review)
+        finally:
+            # 确保后台通知全部发送完成
+            await asyncio.gather(*self._notify_tasks, return_exceptions=True)
+            self._notify_tasks.clear()
+
+    async def _upload_all_videos(self, review: bool):
 
         # 第一步: 账号登录 (智能登录)
         logging.info("【第一步】账号登录")
         # 发送扫码提醒(如果需要的话)
         if not self.config.ACCOUNT_FILE.exists():
-            self.notify_qr_login()
+            self._notify_in_background(self.notify_qr_login)
 
         if not await self.setup_account():
             logging.error("❌ 登录失败,无法继续上传")
             logging.error("请检查网络连接或稍后重试")
             return
 
-        # 第二步: 从 NAS 拉取视频
+        # 第二步: 从 NAS 拉取视频 (与本地已有视频的 AI 分析并行)
+        fetch_task = None
+        local_pending = None
         if self.config.NAS_DIR:
             logging.info("【第二步】从 NAS 拉取视频")
 
             # 检查本地是否已有待上传的视频 (MP4 + TXT)
-            existing_videos = list(self.config.VIDEO_DIR.glob('*.mp4'))
+            existing_videos, names = scan_videos(self.config.VIDEO_DIR, with_stat=False)
             pending_videos = []
-            for v in existing_videos:
-                metadata_path = v.with_suffix('.txt')
-                if metadata_path.exists() and v.name not in self.uploaded_history:
+            for v, _ in existing_videos:
+                if v.with_suffix('.txt').name in names and v.name not in self.uploaded_history:
                     pending_videos.append(v)
 
             if pending_videos:
@@ -634,11 +981,26 @@ class VideoUploader:
                 for v in pending_videos:
                     logging.info(f"  - {v.name}")
             else:
-                self.fetch_from_nas(self.config.NAS_DIR, self.config.VIDEO_DIR)
+                # 先扫描本地已有视频, 再在后台线程中拉取, 避免扫描到复制中的文件
+                local_pending = self._pending_videos()
+                fetch_task = asyncio.create_task(
+                    asyncio.to_thread(self.fetch_from_nas, self.config.NAS_DIR, self.config.VIDEO_DIR)
+                )
+
+        if not review:
+            # 跳过人工审核: 元数据生成与上传流水线并行
+            # NAS 拉取期间先处理本地已有视频, 拉取完成后再把新视频送入流水线
+            logging.info("【第三步】生成元数据并上传 (跳过人工审核)")
+            await self._upload_pipeline(local_pending, fetch_task)
+            return
 
         # 第三步: 生成所有元数据文件
         logging.info("【第三步】生成元数据文件")
-        metadata_files = self.generate_all_metadata()
+        if fetch_task:
+            # NAS 拉取期间先处理本地已有视频, 拉取完成后再补充新视频
+            await self.generate_all_metadata(local_pending)
+            await fetch_task
+        metadata_files = await self.generate_all_metadata()
         if not metadata_files:
             logging.info("没有需要上传的视频文件")
             return
@@ -652,7 +1014,7 @@ class VideoUploader:
         logging.info("⚠️  请根据实际视频内容修改标题和标签!")
         logging.info("✅ 修改完成后,按回车键继续上传...")
         # 发送审核提醒
-        self.notify_manual_review(len(metadata_files))
+        self._notify_in_background(self.notify_manual_review, len(metadata_files))
 
         # 第五步: 批量上传
         logging.info("【第五步】批量上传")
@@ -663,35 +1025,131 @@ class VideoUploader:
             logging.error("❌ 登录验证失败/已过期,且重新登录失败,无法继续")
             return
 
-        logging.info(f"📤 开始上传 {len(metadata_files)} 个视频...")
-        success_count = 0
-        fail_count = 0
-        for i, (video_file, metadata_file) in enumerate(metadata_files, 1):
-            logging.info(f"进度: [{i}/{len(metadata_files)}]")
+        logging.info(f"📤 开始上传 {len(metadata_files)} 个视频 (并发数: {self.config.UPLOAD_CONCURRENCY})...")
+        semaphore = asyncio.Semaphore(self.config.UPLOAD_CONCURRENCY)
+        total = len(metadata_files)
 
-            try:
-                result = await self.upload_single_video(video_file, metadata_file)
-                if result:
-                    success_count += 1
+        async def _upload(i, video_file, metadata_file):
+            async with semaphore:
+                logging.info(f"进度: [{i}/{total}] {video_file.name}")
+                return await self.upload_single_video(video_file, metadata_file)
+
+        results = await asyncio.gather(
+            *[_upload(i, v, m) for i, (v, m) in enumerate(metadata_files, 1)],
+            return_exceptions=True
+        )
+
+        failed_videos = []
+        for (video_file, _), result in zip(metadata_files, results):
+            if isinstance(result, Exception):
+                logging.error(f"上传异常: {video_file.name} -> {result}")
+            if result is not True:
+                failed_videos.append(video_file.name)
+
+        self._report_completion(total, failed_videos)
+
+    async def _upload_pipeline(self, pending=None, fetch_task: Optional[asyncio.Task] = None):
+        """流水线上传: 每个视频的元数据生成后立即进入上传队列
+
+        上传第 j 个视频的同时继续分析后续视频, 总耗时约为 max(AI 分析, 上传) 而非两者之和
+
+        Args:
+            pending: 预先扫描得到的 _pending_videos() 结果 (可选, 默认重新扫描)
+            fetch_task: 进行中的 NAS 拉取任务 (可选); 先处理 pending 中的视频,
+                拉取完成后重新扫描, 把新增视频送入同一条流水线
+        """
+        video_files, names = pending if pending is not None else self._pending_videos()
+        if not video_files and fetch_task is None:
+            logging.info("没有需要上传的视频文件")
+            return
+
+        workers = self.config.UPLOAD_CONCURRENCY
+        total = len(video_files)
+        logging.info(f"📤 开始处理 {total} 个视频 (上传并发数: {workers})...")
+
+        queue = asyncio.Queue(maxsize=2)
+        failed_videos = []
+
+        async def _feed(batch, batch_names):
+            # 跳过人工审核: AI 分析失败的视频不使用默认标题直接发布, 计入失败
+            for job in asyncio.as_completed(self._metadata_jobs(batch, batch_names, allow_fallback=False)):
+                video_file, metadata_file = await job
+                if metadata_file:
+                    await queue.put((video_file, metadata_file))
                 else:
-                    fail_count += 1
-            except Exception as e:
-                fail_count += 1
-                logging.error(f"上传异常: {e}")
+                    failed_videos.append(video_file.name)
+
+        async def _produce():
+            nonlocal total
+            try:
+                await _feed(video_files, names)
+                if fetch_task is not None:
+                    await fetch_task
+                    # 拉取完成后补充新增的视频
+                    seen = set(video_files)
+                    more, more_names = self._pending_videos()
+                    more = [v for v in more if v not in seen]
+                    if more:
+                        total += len(more)
+                        logging.info(f"📤 NAS 拉取新增 {len(more)} 个视频, 加入上传流水线")
+                        await _feed(more, more_names)
+            finally:
+                for _ in range(workers):
+                    await queue.put(None)
+
+        async def _consume():
+            while (item := await queue.get()) is not None:
+                video_file, metadata_file = item
+                try:
+                    result = await self.upload_single_video(video_file, metadata_file)
+                except Exception as e:
+                    logging.error(f"上传异常: {video_file.name} -> {e}")
+                    result = False
+                if not result:
+                    failed_videos.append(video_file.name)
 
-            logging.info(f"当前统计 - 成功: {success_count}, 失败: {fail_count}")
+        await asyncio.gather(_produce(), *[_consume() for _ in range(workers)])
+
+        if not total:
+            logging.info("没有需要上传的视频文件")
+            return
+        self._report_completion(total, failed_videos)
+
+    def _report_completion(self, total: int, failed_videos: List[str]):
+        """输出上传统计并发送完成通知"""
+        fail_count = len(failed_videos)
+        success_count = total - fail_count
 
         logging.info("上传完成!")
-        logging.info(f"总计: {len(metadata_files)} 个文件")
+        logging.info(f"总计: {total} 个文件")
         logging.info(f"成功: {success_count} 个")
         logging.info(f"失败: {fail_count} 个")
 
         # 发送完成提醒
-        self.notify_completion(len(metadata_files), success_count, fail_count)
+        self._notify_in_background(
+            self.notify_completion, total, success_count, fail_count, failed_videos
+        )
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="独立视频号上传工具")
+    parser.add_argument(
+        '--no-review',
+        action='store_true',
+        help='跳过人工审核, AI 生成元数据后直接上传 (分析与上传流水线并行)'
+    )
+    parser.add_argument(
+        '--no-ai-cache',
+        action='store_true',
+        help='不使用 AI 分析缓存, 重新分析需要生成元数据的视频 (删除 .txt 后重新生成时使用)'
+    )
+    return parser.parse_args()
 
 
 async def main():
     """主函数"""
+    args = parse_args()
     try:
         logging.info("独立视频号上传工具启动")
 
@@ -699,10 +1157,13 @@ async def main():
         config = StandaloneUploadConfig()
 
         # 创建上传器
-        uploader = VideoUploader(config)
+        uploader = VideoUploader(config, use_ai_cache=not args.no_ai_cache)
 
         # 执行上传
-        await uploader.upload_all_videos()
+        try:
+            await uploader.upload_all_videos(review=not args.no_review)
+        finally:
+            uploader.close()
 
     except KeyboardInterrupt:
         logging.info("\n用户中断,程序退出")
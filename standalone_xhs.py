@@ -7,13 +7,16 @@
 """
 import argparse
 import asyncio
-import json
+import os
+import random
 import re
 import sys
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
+import orjson
 from dotenv import load_dotenv
 from XHS.xhs_downloader import XHSDownloader
 
@@ -21,10 +24,84 @@ from XHS.xhs_downloader import XHSDownloader
 sys.path.insert(0, str(Path(__file__).parent / "XHS"))
 
 
+# Playwright 获取笔记列表时拦截的资源类型
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
 
-@dataclass
+# 埋点上报/性能监控等与页面内容无关的请求
+BLOCKED_URL_PATTERN = re.compile(r"//(?:t2|apm-fe)\.xiaohongshu\.com/|sentry", re.I)
+
+# 收集页面上所有笔记卡片: note_id、链接、标题、页面链接中已有的 xsec_token，以及可见父容器的视口中心坐标 (用于中键点击)，
+# 同时返回页面高度和是否已到底部，用于判断滚动是否结束
+NOTE_CARDS_JS = '''() => {
+    // 先检查 link 自身，否则向上找最近的有宽高祖先
+    const center = (link) => {
+        let rect = link.getBoundingClientRect();
+        if (rect.width > 1 && rect.height > 1) {
+            return {x: rect.x + rect.width / 2, y: rect.y + rect.height / 2};
+        }
+        let el = link.parentElement;
+        for (let i = 0; i < 10; i++) {
+            if (!el || el === document.body) break;
+            rect = el.getBoundingClientRect();
+            if (rect.width > 10 && rect.height > 10) {
+                return {x: rect.x + rect.width / 2, y: rect.y + rect.height / 2};
+            }
+            el = el.parentElement;
+        }
+        return null;
+    };
+    // 已处理过的链接在页面内打标记 (记录当时的 href，节点被复用换了链接时会重新处理)，
+    // 每轮只解析、回传新出现的卡片，而不是把 DOM 中全部卡片重新序列化给 Python
+    // 卡片封面链接 (/user/profile/<uid>/<note_id>?xsec_token=...) 通常已带 token，按 note_id 收集到页面全局表
+    const tokens = window.__xhsTokens || (window.__xhsTokens = {});
+    document.querySelectorAll('a[href*="xsec_token="]').forEach(a => {
+        if (a.dataset.xhsToken === a.href) return;
+        a.dataset.xhsToken = a.href;
+        try {
+            const id = new URL(a.href).pathname.split('/').pop();
+            // 保留原始编码，与从新标签页 URL 截取 token 的方式一致
+            const token = a.href.split('xsec_token=')[1].split('&')[0];
+            if (id && token && !tokens[id]) tokens[id] = token;
+        } catch (e) {}
+    });
+    const result = [];
+    const seen = new Set();
+    const links = document.querySelectorAll('a[href*="/explore/"]');
+    links.forEach(link => {
+        const href = link.href || '';
+        if (link.dataset.xhsSeen === href) return;
+        link.dataset.xhsSeen = href;
+        const match = href.match(/\\/explore\\/([a-zA-Z0-9]+)/);
+        if (match && !seen.has(match[1])) {
+            seen.add(match[1]);
+            result.push({
+                note_id: match[1],
+                href: href,
+                title: (link.innerText || '').trim().slice(0, 50),
+                coords: center(link),
+                token: tokens[match[1]] || null
+            });
+        }
+    });
+    return {
+        cards: result,
+        linkCount: links.length,
+        height: document.body.scrollHeight,
+        // 已滚动到页面底部，或出现了"没有更多"的结束标记
+        atBottom: window.scrollY + window.innerHeight >= document.body.scrollHeight - 10,
+        end: !!document.querySelector('.end-container, .no-more-container')
+    };
+}'''
+
+# 滚动后等待新内容: 页面变高或出现更多笔记链接
+WAIT_MORE_NOTES_JS = '''([height, count]) =>
+    document.body.scrollHeight > height ||
+    document.querySelectorAll('a[href*="/explore/"]').length > count'''
+
+
+@dataclass(slots=True, frozen=True)
 class UserNote:
-    """用户笔记信息"""
+    """用户笔记信息 (不可变，无 __dict__，大量笔记时更省内存)"""
     note_id: str
     note_url: str
     title: str
@@ -57,6 +134,12 @@ class XHSUserMonitor:
         r"(?:https?://)?(?:www\.)?xiaohongshu\.com/(?:explore|discovery/item)/([a-zA-Z0-9]+)"
     )
 
+    # 链接文件整行正则 (多行模式): 跳过空行和 # 注释行，group(1) 为去掉首尾空白的整行，group(2) 为笔记ID
+    NOTE_LINE_PATTERN = re.compile(
+        r"^[ \t]*(?![#\s])(.*?xiaohongshu\.com/(?:explore|discovery/item)/([a-zA-Z0-9]+).*?)[ \t]*$",
+        re.MULTILINE
+    )
+
     def __init__(
         self,
         user_url: str,
@@ -70,6 +153,12 @@ class XHSUserMonitor:
         save_text: bool = True,
         download_image: bool = True,
         download_video: bool = True,
+        concurrency: int = 4,
+        show_browser: bool = False,
+        browser_endpoint: str = None,
+        verbose: bool = False,
+        max_retries: int = 2,
+        early_stop: int = 5,
     ):
         """
         初始化监控器
@@ -86,17 +175,36 @@ class XHSUserMonitor:
             save_text: 是否保存文案
             download_image: 是否下载图片
             download_video: 是否下载视频
+            concurrency: 同时下载的笔记数
+            show_browser: 是否显示浏览器窗口(调试用)，默认无头模式
+            browser_endpoint: 常驻浏览器地址 (ws:// 为 launch_server，http:// 为 CDP)，为空则每次启动新浏览器
+            verbose: 是否输出每个笔记的详细过程 (开始下载/跳过)
+            max_retries: 下载失败后的最大重试次数 (指数退避)
+            early_stop: 获取用户笔记列表时连续遇到多少个已下载笔记即停止 (增量更新)，0表示不提前停止
         """
         # 加载环境变量
         load_dotenv()
 
         self.user_url = user_url
+        # 只匹配一次，_is_user_profile_url 直接复用结果
+        # 纯用户ID (不含 '/') 无需走正则
+        is_url = '/' in user_url
+        self._user_match = self.USER_URL_PATTERN.search(user_url) if is_url else None
+        # 直接传入单个笔记链接或链接文件时，无需获取用户笔记列表
+        self._note_match = self.NOTE_URL_PATTERN.search(user_url) if is_url and not self._user_match else None
+        self._link_file = not self._user_match and not self._note_match and Path(user_url.strip()).is_file()
         self.user_id = self._extract_user_id(user_url)
         self.download_dir = Path(download_dir)
         self.delay = delay
         self.max_notes = max_notes
         self.skip_existing = skip_existing
         self.save_text = save_text
+        self.concurrency = max(1, concurrency)
+        self.show_browser = show_browser
+        self.browser_endpoint = browser_endpoint
+        self.verbose = verbose
+        self.max_retries = max(0, max_retries)
+        self.early_stop = max(0, early_stop)
 
         # 创建下载器
         self.downloader = XHSDownloader(
@@ -117,27 +225,132 @@ class XHSUserMonitor:
             'skipped': 0,
         }
 
-        # 笔记记录文件
+        # 笔记记录文件: .txt 每行一个已下载的笔记ID (只追加, 启动时读取);
+        # .json 为便于查看的汇总记录, 仅在 close() 时写出
         self.record_file = self.download_dir / f"user_{self.user_id}_notes.json"
+        self.record_ids_file = self.record_file.with_suffix('.txt')
+        # Playwright 持久化用户目录 (本地启动时使用) 与登录状态 (连接常驻浏览器时使用)
+        self.browser_profile_dir = self.download_dir / ".pw_profile"
+        self.browser_state_file = self.download_dir / "pw_state.json"
         self.download_dir.mkdir(parents=True, exist_ok=True)
+        self._record_fp = None
+        self._downloaded_ids = self._load_downloaded_ids()
+        # 获取列表时连续遇到的已下载笔记数 (见 _reached_known_notes)
+        self._known_streak = 0
 
     def _extract_user_id(self, url_or_id: str) -> str:
         """从URL中提取用户ID，或直接返回用户ID"""
-        match = self.USER_URL_PATTERN.search(url_or_id)
-        if match:
-            return match.group(1)
+        if self._user_match:
+            return self._user_match.group(1)
+        if self._note_match or self._link_file:
+            # 非用户主页输入共用一份下载记录
+            return "links"
         # 假设直接传入的就是用户ID
         return url_or_id.strip()
 
     def _is_user_profile_url(self) -> bool:
         """检测是否为完整的用户主页URL"""
-        return bool(self.USER_URL_PATTERN.search(self.user_url))
+        return self._user_match is not None
+
+    def _parse_cookie(self) -> dict:
+        """将 Cookie 字符串解析为 {name: value}"""
+        cookies = {}
+        for item in (self.downloader.cookie or '').split(';'):
+            if '=' in item:
+                name, value = item.strip().split('=', 1)
+                cookies[name] = value
+        return cookies
+
+    async def fetch_user_notes_from_api(self) -> Optional[List[UserNote]]:
+        """
+        方案0: 直接调用小红书 Web 接口 user_posted 分页获取笔记列表
+        无需启动浏览器，接口签名由 XHS/source/request 模块生成，需要 Cookie 中的 web_session。
+
+        Returns:
+            笔记列表；接口不可用 (缺少依赖/未登录/被风控) 时返回 None，由调用方回退到 Playwright
+        """
+        web_session = self._parse_cookie().get('web_session')
+        if not web_session:
+            print("[提示] Cookie 中没有 web_session，无法使用接口获取笔记列表")
+            return None
+
+        source_dir = str(Path(__file__).parent / "XHS" / "source")
+        if source_dir not in sys.path:
+            sys.path.insert(0, source_dir)
+        try:
+            from request.web.xhs_session import create_xhs_session
+        except ImportError as e:
+            print(f"[提示] 接口模块依赖缺失 ({e})，无法使用接口获取笔记列表")
+            return None
+
+        print("[接口] 正在通过 user_posted 接口获取笔记列表...")
+        notes = {}
+        session = None
+        try:
+            session = await create_xhs_session(web_session=web_session, proxy=self.downloader.proxy)
+            cursor = ""
+            stopped_early = False
+            self._known_streak = 0
+            while True:
+                res = await session.apis.note.search_user_notes(self.user_id, num=30, cursor=cursor)
+                data = orjson.loads(await res.read()).get('data') or {}
+
+                for item in data.get('notes', []):
+                    note_id = item.get('note_id')
+                    if not note_id or note_id in notes:
+                        continue
+                    if self._reached_known_notes(note_id):
+                        stopped_early = True
+                        break
+                    token = item.get('xsec_token')
+                    note_url = f"https://www.xiaohongshu.com/explore/{note_id}"
+                    if token:
+                        note_url += f"?xsec_token={token}&xsec_source=pc_user"
+                    liked = (item.get('interact_info') or {}).get('liked_count', '0')
+                    notes[note_id] = UserNote(
+                        note_id=note_id,
+                        note_url=note_url,
+                        title=item.get('display_title') or f"笔记_{note_id}",
+                        note_type=item.get('type') or "unknown",
+                        likes=int(liked) if str(liked).isdigit() else 0
+                    )
+
+                if stopped_early or (self.max_notes > 0 and len(notes) >= self.max_notes):
+                    break
+                cursor = data.get('cursor') or ""
+                if not data.get('has_more') or not cursor:
+                    break
+                # 翻页间隔，防风控
+                await asyncio.sleep(max(0.5, self.delay * 0.3))
+
+        except Exception as e:
+            print(f"[提示] 接口获取笔记列表失败: {e}")
+            return None
+        finally:
+            if session is not None:
+                await session.close_session()
+
+        result = list(notes.values())
+        if self.max_notes > 0:
+            result = result[:self.max_notes]
+        print(f"[完成] 接口共获取 {len(result)} 个笔记")
+        return result
+
+    @staticmethod
+    async def _block_heavy_resources(route):
+        """拦截发现笔记阶段用不到的资源请求"""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_URL_PATTERN.search(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
 
     async def fetch_user_notes_from_page(self) -> List[UserNote]:
         """
         方案1: 从用户主页获取笔记列表 (使用 Playwright)
-        策略: 边滚动边处理 —— 每次滚动后立即对当前可见的新笔记卡片执行 JS click，
-               捕获新标签页 URL（含 xsec_token），避免虚拟滚动导致元素不可见。
+        策略: 边滚动边处理 —— xsec_token 优先取自卡片链接和笔记列表接口响应，
+               两者都没有时才对当前可见的新笔记卡片中键点击，捕获新标签页 URL（含 xsec_token），
+               避免虚拟滚动导致元素不可见。
         """
         try:
             from playwright.async_api import async_playwright
@@ -145,30 +358,77 @@ class XHSUserMonitor:
             print("[错误] 未安装 Playwright，请运行: pip install playwright && playwright install chromium")
             return []
 
+        # 可选: 关闭 Playwright 每次调用时的 inspect.stack() 采集
+        if os.environ.get('PW_INSPECT_STACK', '1') == '0':
+            import playwright_fastpatch
+            if playwright_fastpatch.apply():
+                print("[提示] 已关闭 Playwright 调用栈采集 (PW_INSPECT_STACK=0)")
+
         notes = []
 
         async with async_playwright() as p:
-            print(f"[启动] 正在启动浏览器获取用户笔记列表...")
-            browser = await p.chromium.launch(headless=False)
-            context = await browser.new_context(
-                user_agent=self.downloader.user_agent or None
-            )
+            # 更高的视口每次滚动能加载更多卡片
+            context_options = {
+                'user_agent': self.downloader.user_agent or None,
+                'viewport': {'width': 1280, 'height': 2000},
+            }
+            browser = None
+            if self.browser_endpoint:
+                # 连接常驻浏览器，省去每次冷启动; 复用上次保存的登录状态
+                print(f"[连接] 正在连接浏览器: {self.browser_endpoint}")
+                if self.browser_endpoint.startswith('http'):
+                    browser = await p.chromium.connect_over_cdp(self.browser_endpoint)
+                else:
+                    browser = await p.chromium.connect(self.browser_endpoint)
+                context = await browser.new_context(
+                    storage_state=str(self.browser_state_file) if self.browser_state_file.exists() else None,
+                    **context_options
+                )
+            else:
+                # 持久化用户目录: 登录状态、HTTP 缓存 (JS/CSS 资源) 跨次运行保留
+                print(f"[启动] 正在启动浏览器获取用户笔记列表...")
+                context = await p.chromium.launch_persistent_context(
+                    user_data_dir=str(self.browser_profile_dir),
+                    headless=not self.show_browser,
+                    args=[
+                        '--disable-blink-features=AutomationControlled',
+                        '--disable-dev-shm-usage',
+                        '--disk-cache-size=268435456',
+                    ],
+                    **context_options
+                )
+            # 只需要笔记链接，拦截图片/视频/字体 (保留样式表，卡片坐标依赖布局)
+            await context.route('**/*', self._block_heavy_resources)
 
-            # 注入Cookie
+            # 注入Cookie (覆盖保存的登录状态中的同名 Cookie)
             if self.downloader.cookie:
-                cookies = []
-                for item in self.downloader.cookie.split(';'):
-                    if '=' in item:
-                        name, value = item.strip().split('=', 1)
-                        cookies.append({
-                            'name': name,
-                            'value': value,
-                            'domain': '.xiaohongshu.com',
-                            'path': '/'
-                        })
+                cookies = [
+                    {'name': name, 'value': value, 'domain': '.xiaohongshu.com', 'path': '/'}
+                    for name, value in self._parse_cookie().items()
+                ]
                 await context.add_cookies(cookies)
 
-            page = await context.new_page()
+            page = context.pages[0] if context.pages else await context.new_page()
+
+            # 监听笔记列表接口: 滚动加载的每一页笔记都自带 xsec_token，按 note_id 记录，
+            # 卡片链接上没有 token 时直接使用，省去中键点击打开新标签页
+            posted = {}
+            posted_has_more = True
+
+            async def _on_response(response):
+                nonlocal posted_has_more
+                if '/api/sns/web/v1/user_posted' not in response.url or response.status != 200:
+                    return
+                try:
+                    data = orjson.loads(await response.body()).get('data') or {}
+                except Exception:
+                    return
+                posted_has_more = bool(data.get('has_more', True))
+                for item in data.get('notes') or []:
+                    if item.get('note_id') and item.get('xsec_token'):
+                        posted.setdefault(item['note_id'], item)
+
+            page.on('response', _on_response)
 
             # 访问用户主页
             user_page_url = f"https://www.xiaohongshu.com/user/profile/{self.user_id}"
@@ -179,31 +439,22 @@ class XHSUserMonitor:
             # ===== 边滚动边点击：每次滚动后立即处理当前可见的新笔记卡片 =====
             print("[开始] 边滚动边获取笔记 xsec_token...")
             processed_ids = set()
+            skipped_clicks = 0
+            stopped_early = False
+            self._known_streak = 0
             no_change_rounds = 0
             scroll_round = 0
+            prev_height = 0
 
             while True:
                 scroll_round += 1
 
-                # 获取当前 DOM 中所有可见笔记链接
-                card_infos = await page.evaluate('''() => {
-                    const links = document.querySelectorAll('a[href*="/explore/"]');
-                    const result = [];
-                    links.forEach(link => {
-                        const href = link.href || '';
-                        const match = href.match(/\/explore\/([a-zA-Z0-9]+)/);
-                        if (match) {
-                            result.push({
-                                note_id: match[1],
-                                href: href,
-                                title: (link.innerText || '').trim().slice(0, 50)
-                            });
-                        }
-                    });
-                    return result;
-                }''')
-
-                # 过滤出本轮新出现的卡片
+                # 获取本轮新出现的笔记链接 (已返回过的链接在页面内已打标记，不会重复回传)
+                # 一次 evaluate 同时取回链接、标题和点击坐标，省去每张卡片单独查询坐标的往返
+                state = await page.evaluate(NOTE_CARDS_JS)
+                card_infos = state['cards']
+
+                # 过滤掉已处理的笔记 (同一笔记可能有多个链接节点)
                 new_cards = [c for c in card_infos if c['note_id'] not in processed_ids]
                 if not new_cards:
                     no_change_rounds += 1
@@ -216,33 +467,38 @@ class XHSUserMonitor:
                     if note_id in processed_ids:
                         continue
                     processed_ids.add(note_id)
+                    if self._reached_known_notes(note_id):
+                        stopped_early = True
+                        break
 
-                    print(f"  [{len(processed_ids)}] 处理笔记 {note_id}...")
-                    title = card.get('title') or f"笔记_{note_id}"
+                    item = posted.get(note_id, {})
+                    title = card.get('title') or item.get('display_title') or f"笔记_{note_id}"
+
+                    # 卡片封面链接或列表接口中已有 xsec_token 时直接使用，无需点击打开新标签页
+                    token = card.get('token') or item.get('xsec_token')
+                    if token:
+                        note_url = f"https://www.xiaohongshu.com/explore/{note_id}?xsec_token={token}&xsec_source=pc_user"
+                    elif self.skip_existing and self._is_downloaded(note_id):
+                        # 已下载的笔记在下载阶段会直接跳过，用不到 token，也不必点击
+                        note_url = f"https://www.xiaohongshu.com/explore/{note_id}"
+                        skipped_clicks += 1
+                    else:
+                        note_url = None
+                    if note_url:
+                        notes.append(UserNote(
+                            note_id=note_id,
+                            note_url=note_url,
+                            title=title,
+                            note_type=item.get('type') or "unknown"
+                        ))
+                        if self.max_notes > 0 and len(processed_ids) >= self.max_notes:
+                            print(f"[完成] 已处理 {len(processed_ids)} 个，达到最大限制")
+                            break
+                        continue
 
+                    print(f"  [{len(processed_ids)}] 处理笔记 {note_id}...")
                     try:
-                        # JS 向上遍历 DOM，找到有宽高的可见父容器，返回其视口中心坐标
-                        coords = await page.evaluate(f'''() => {{
-                            const link = document.querySelector('a[href*="/explore/{note_id}"]');
-                            if (!link) return null;
-                            // 先检查 link 自身
-                            let rect = link.getBoundingClientRect();
-                            if (rect.width > 1 && rect.height > 1) {{
-                                return {{x: rect.x + rect.width / 2, y: rect.y + rect.height / 2}};
-                            }}
-                            // 向上找最近的有宽高祖先
-                            let el = link.parentElement;
-                            for (let i = 0; i < 10; i++) {{
-                                if (!el || el === document.body) break;
-                                rect = el.getBoundingClientRect();
-                                if (rect.width > 10 && rect.height > 10) {{
-                                    return {{x: rect.x + rect.width / 2, y: rect.y + rect.height / 2}};
-                                }}
-                                el = el.parentElement;
-                            }}
-                            return null;
-                        }}''')
-
+                        coords = card.get('coords')
                         if coords is None:
                             raise Exception("找不到可见父元素，卡片可能未在视口内")
 
@@ -294,11 +550,21 @@ class XHSUserMonitor:
                         print(f"[完成] 已处理 {len(processed_ids)} 个，达到最大限制")
                         break
 
-                # 检查是否达到最大数量
-                if self.max_notes > 0 and len(processed_ids) >= self.max_notes:
+                # 检查是否达到最大数量，或已提前停止
+                if stopped_early or (self.max_notes > 0 and len(processed_ids) >= self.max_notes):
+                    break
+
+                # 出现结束标记，或已在底部且本轮既无新笔记、页面也没有变高，判断已到底部
+                if state['end'] or (no_change_rounds and state['atBottom'] and state['height'] == prev_height):
+                    print("[滚动完成] 已到底部")
                     break
 
-                # 连续3次无新内容，判断已到底部
+                # 列表接口已返回最后一页 (has_more 为 false)，且本轮没有新笔记
+                if no_change_rounds and not posted_has_more:
+                    print("[滚动完成] 列表接口已无更多笔记")
+                    break
+
+                # 兜底: 连续3次无新内容
                 if no_change_rounds >= 3:
                     print("[滚动完成] 连续3次无新笔记，已到底部")
                     break
@@ -307,21 +573,49 @@ class XHSUserMonitor:
                     print("[滚动完成] 已达最大滚动次数")
                     break
 
-                # 向下滚动，继续加载
+                # 向下滚动，新内容一出现就继续，最多等待 1.5 秒
+                prev_height = state['height']
                 await page.evaluate('window.scrollBy(0, 800)')
-                await asyncio.sleep(1.5)
-
-            await browser.close()
-
-        # 去重
-        unique_notes = {}
-        for note in notes:
-            if note.note_id not in unique_notes:
-                unique_notes[note.note_id] = note
+                try:
+                    await page.wait_for_function(
+                        WAIT_MORE_NOTES_JS, arg=[prev_height, state['linkCount']], timeout=1500
+                    )
+                except Exception:
+                    pass
+
+            # 列表接口返回、但滚动过程中没有出现在 DOM 中的笔记 (如虚拟滚动跳过的卡片)
+            # 已提前终止时不补充: 接口多返回的都是更早的笔记
+            if not stopped_early:
+                for note_id, item in posted.items():
+                    if self.max_notes > 0 and len(processed_ids) >= self.max_notes:
+                        break
+                    if note_id in processed_ids:
+                        continue
+                    processed_ids.add(note_id)
+                    notes.append(UserNote(
+                        note_id=note_id,
+                        note_url=f"https://www.xiaohongshu.com/explore/{note_id}?xsec_token={item['xsec_token']}&xsec_source=pc_user",
+                        title=item.get('display_title') or f"笔记_{note_id}",
+                        note_type=item.get('type') or "unknown"
+                    ))
 
-        notes_with_token = sum(1 for n in unique_notes.values() if 'xsec_token' in n.note_url)
-        print(f"[完成] 共获取 {len(unique_notes)} 个唯一笔记，其中 {notes_with_token} 个含 xsec_token")
-        return list(unique_notes.values())
+            # 连接的常驻浏览器每次使用新上下文，需要单独保存登录状态供下次复用
+            if browser is not None:
+                try:
+                    await context.storage_state(path=str(self.browser_state_file))
+                except Exception as e:
+                    print(f"[警告] 保存浏览器登录状态失败: {e}")
+
+            await context.close()
+            if browser is not None:
+                await browser.close()
+
+        # processed_ids 已保证每个笔记只追加一次，无需再次去重
+        notes_with_token = sum(1 for n in notes if 'xsec_token' in n.note_url)
+        print(f"[完成] 共获取 {len(notes)} 个唯一笔记，其中 {notes_with_token} 个含 xsec_token")
+        if skipped_clicks:
+            print(f"[跳过] {skipped_clicks} 个已下载笔记无需点击获取 xsec_token")
+        return notes
 
     async def fetch_user_notes_from_file(self, file_path: str) -> List[UserNote]:
         """
@@ -331,28 +625,26 @@ class XHSUserMonitor:
         https://www.xiaohongshu.com/explore/xxx?xsec_token=xxx
         https://www.xiaohongshu.com/explore/yyy?xsec_token=yyy
         """
-        notes = []
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-
-                match = self.NOTE_URL_PATTERN.search(line)
-                if match:
-                    note_id = match.group(1)
-                    # 保留完整的原始URL（包含xsec_token等参数）
-                    note_url = line
-                    notes.append(UserNote(
-                        note_id=note_id,
-                        note_url=note_url,
-                        title=f"笔记_{note_id}",
-                        note_type="unknown"
-                    ))
+        # 按 note_id 去重，重复链接只保留第一次出现的
+        notes = {}
+        duplicates = 0
+
+        # 一次读入整个文件，由正则在全文上单趟定位有效行，不再逐行 strip / 判断 / search
+        text = Path(file_path).read_text(encoding='utf-8')
+        for line, note_id in self.NOTE_LINE_PATTERN.findall(text):
+            if note_id in notes:
+                duplicates += 1
+                continue
+            # 保留完整的原始URL（包含xsec_token等参数）
+            notes[note_id] = UserNote(
+                note_id=note_id,
+                note_url=line,
+                title=f"笔记_{note_id}",
+                note_type="unknown"
+            )
 
-        print(f"[读取] 从文件读取到 {len(notes)} 个笔记链接")
-        return notes
+        print(f"[读取] 从文件读取到 {len(notes)} 个笔记链接" + (f"（忽略重复 {duplicates} 个）" if duplicates else ""))
+        return list(notes.values())
 
     async def fetch_user_notes_manual(self) -> List[UserNote]:
         """
@@ -364,7 +656,8 @@ class XHSUserMonitor:
         print("请输入笔记链接，每行一个，输入空行结束:")
         print()
 
-        notes = []
+        # 按 note_id 去重，重复输入的链接只保留第一次
+        notes = {}
         while True:
             try:
                 line = input("笔记链接: ").strip()
@@ -374,14 +667,16 @@ class XHSUserMonitor:
                 match = self.NOTE_URL_PATTERN.search(line)
                 if match:
                     note_id = match.group(1)
+                    if note_id in notes:
+                        print(f"  ⊙ 已添加过: {note_id}")
+                        continue
                     # 保留完整的原始URL（包含xsec_token等参数）
-                    note_url = line
-                    notes.append(UserNote(
+                    notes[note_id] = UserNote(
                         note_id=note_id,
-                        note_url=note_url,
+                        note_url=line,
                         title=f"笔记_{note_id}",
                         note_type="unknown"
-                    ))
+                    )
                     print(f"  ✓ 已添加: {note_id}")
                 else:
                     print(f"  ✗ 无效链接，请重新输入")
@@ -389,7 +684,7 @@ class XHSUserMonitor:
                 break
 
         print(f"\n[完成] 共添加 {len(notes)} 个笔记")
-        return notes
+        return list(notes.values())
 
     async def download_all_notes(self, notes: List[UserNote]):
         """批量下载所有笔记"""
@@ -404,72 +699,164 @@ class XHSUserMonitor:
         print("=" * 60)
         print()
 
-        for i, note in enumerate(notes, 1):
-            print(f"\n[{i}/{len(notes)}] 下载笔记: {note.title}")
-            print(f"  URL: {note.note_url}")
+        total = len(notes)
+        sem = asyncio.Semaphore(self.concurrency)
 
-            try:
-                # 检查是否已下载
-                if self.skip_existing and self._is_downloaded(note.note_id):
-                    print(f"  ⊙ 已下载，跳过")
-                    self.stats['skipped'] += 1
-                    continue
-
-                # 下载笔记
-                content = await self.downloader.download(
-                    note.note_url,
-                    save_text=self.save_text
-                )
+        # 全部已下载 (定时轮询的常见情况) 时不创建下载引擎，直接结束
+        if self.skip_existing and all(self._is_downloaded(n.note_id) for n in notes):
+            self.stats['skipped'] = total
+            print("[完成] 所有笔记均已下载，没有新内容")
+            self._print_statistics()
+            return
+
+        # 全局错峰: 相邻两次请求的发起至少间隔 delay / concurrency，
+        # 避免各并发名额同时起跑造成突发请求，整体速率不超过 concurrency / delay
+        start_gap = self.delay / self.concurrency
+        next_start = 0.0
+
+        async def _wait_turn():
+            nonlocal next_start
+            now = time.monotonic()
+            wait = next_start - now
+            next_start = max(now, next_start) + start_gap
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        async def _download_one(i: int, note: UserNote):
+            # 检查是否已下载
+            if self.skip_existing and self._is_downloaded(note.note_id):
+                # 跳过的笔记只计数，汇总在统计中 (大量历史笔记时避免刷屏)
+                if self.verbose:
+                    print(f"[{i}/{total}] ⊙ 已下载，跳过: {note.title}")
+                self.stats['skipped'] += 1
+                return
+
+            async with sem:
+                if self.verbose:
+                    print(f"[{i}/{total}] 下载笔记: {note.title}\n  URL: {note.note_url}")
+                started = time.monotonic()
+                # 缺少 xsec_token 的链接失败属于永久性错误，不重试
+                retryable = 'xsec_token' in note.note_url
+                attempts = 1 + (self.max_retries if retryable else 0)
+                content = error = None
+
+                for attempt in range(attempts):
+                    if attempt:
+                        # 指数退避 + 抖动，应对限流/网络波动等临时失败
+                        await asyncio.sleep(min(2 ** attempt, 30) + random.random())
+                    await _wait_turn()
+                    last_start = time.monotonic()
+                    try:
+                        # 下载笔记
+                        content = await self.downloader.download(
+                            note.note_url,
+                            save_text=self.save_text
+                        )
+                        error = None
+                    except Exception as e:
+                        content, error = None, e
+                    if content:
+                        break
 
                 if content:
-                    print(f"  ✓ 下载成功")
-                    self.stats['success'] += 1
+                    status = "✓ 下载成功"
+                    # 先写记录再计数: 写记录失败时由外层按失败统计，不会同时计入成功
                     self._mark_downloaded(note.note_id)
+                    self.stats['success'] += 1
                 else:
-                    print(f"  ✗ 下载失败")
+                    status = f"✗ 下载异常 ({error})" if error else "✗ 下载失败"
                     self.stats['failed'] += 1
+                if attempt:
+                    status += f"，重试 {attempt} 次"
+
+                # 每个笔记只输出一行结果
+                print(f"[{i}/{total}] {status}: {note.title} ({time.monotonic() - started:.1f}s)")
+
+                # 带抖动的间隔，占住并发名额，避免请求过快: 只补足距上次发起请求不足的部分，
+                # 下载本身已超过间隔 (如大视频) 时不再等待 (永久性失败没有发出有效请求，也不等待)
+                if content or retryable:
+                    gap = self.delay * random.uniform(0.5, 1.5) - (time.monotonic() - last_start)
+                    if gap > 0:
+                        await asyncio.sleep(gap)
+
+        # 所有笔记共用一个 XHS 实例 (同一组连接池)，避免每个笔记重新握手
+        async with self.downloader:
+            results = await asyncio.gather(
+                *(_download_one(i, note) for i, note in enumerate(notes, 1)),
+                return_exceptions=True
+            )
 
-            except Exception as e:
-                print(f"  ✗ 下载异常: {e}")
+        # 下载调用之外的异常 (如写下载记录失败) 不会打印结果行，在这里补充输出并计为失败
+        for i, (note, result) in enumerate(zip(notes, results), 1):
+            if isinstance(result, Exception):
+                print(f"[{i}/{total}] ✗ 处理异常 ({result}): {note.title}")
                 self.stats['failed'] += 1
 
-            # 延迟，避免请求过快
-            if i < len(notes):
-                print(f"  ⏱ 等待 {self.delay} 秒...")
-                await asyncio.sleep(self.delay)
-
         self._print_statistics()
 
-    def _is_downloaded(self, note_id: str) -> bool:
-        """检查笔记是否已下载"""
-        if not self.record_file.exists():
-            return False
-
-        try:
-            with open(self.record_file, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-                return note_id in records.get('downloaded', [])
-        except Exception:
-            return False
-
-    def _mark_downloaded(self, note_id: str):
-        """标记笔记为已下载"""
-        records = {'downloaded': [], 'updated_at': ''}
+    def _load_downloaded_ids(self) -> dict:
+        """启动时一次性加载已下载的笔记ID, 保持原有顺序"""
+        if self.record_ids_file.exists():
+            return dict.fromkeys(self.record_ids_file.read_text(encoding='utf-8').split())
 
+        # 兼容旧版本: 只有 JSON 记录时迁移为 .txt
+        downloaded = {}
         if self.record_file.exists():
             try:
-                with open(self.record_file, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
+                downloaded = dict.fromkeys(orjson.loads(self.record_file.read_bytes()).get('downloaded', []))
             except Exception:
                 pass
+            if downloaded:
+                self.record_ids_file.write_text(''.join(f"{i}\n" for i in downloaded), encoding='utf-8')
+
+        return downloaded
+
+    def _reached_known_notes(self, note_id: str) -> bool:
+        """
+        增量更新: 按列表顺序 (新笔记在前) 统计连续的已下载笔记，
+        连续达到 early_stop 个时说明之后的笔记都已下载过，可以停止获取列表。
+        每次获取列表前需将 self._known_streak 置 0。
+        """
+        if not self.skip_existing or not self.early_stop:
+            return False
+        if not self._is_downloaded(note_id):
+            self._known_streak = 0
+            return False
+        self._known_streak += 1
+        if self._known_streak >= self.early_stop:
+            print(f"[提前终止] 连续 {self._known_streak} 个笔记已下载，不再获取更早的笔记")
+            return True
+        return False
 
-        if note_id not in records['downloaded']:
-            records['downloaded'].append(note_id)
+    def _is_downloaded(self, note_id: str) -> bool:
+        """检查笔记是否已下载"""
+        return note_id in self._downloaded_ids
 
-        records['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def _mark_downloaded(self, note_id: str):
+        """标记笔记为已下载: 只向 .txt 追加一行, 汇总 JSON 在 close() 时统一写入"""
+        if note_id in self._downloaded_ids:
+            return
+        self._downloaded_ids[note_id] = None
 
-        with open(self.record_file, 'w', encoding='utf-8') as f:
-            json.dump(records, f, ensure_ascii=False, indent=2)
+        if self._record_fp is None:
+            self._record_fp = open(self.record_ids_file, 'a', encoding='utf-8', buffering=1)
+        self._record_fp.write(f"{note_id}\n")
+
+    def close(self):
+        """关闭 ID 记录文件并写出汇总 JSON"""
+        if self._record_fp is None:
+            return
+
+        self._record_fp.close()
+        self._record_fp = None
+
+        records = {
+            'downloaded': list(self._downloaded_ids),
+            'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        tmp_file = self.record_file.with_suffix('.tmp')
+        tmp_file.write_bytes(orjson.dumps(records, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        tmp_file.replace(self.record_file)
 
     def _print_statistics(self):
         """打印下载统计"""
@@ -488,16 +875,23 @@ class XHSUserMonitor:
         
         Args:
             method: 获取笔记的方法
+                - 'api': 直接调用小红书接口 (需要 Cookie 中的 web_session)
                 - 'playwright': 使用 Playwright 自动化浏览器
                 - 'file': 从文件读取笔记链接
                 - 'manual': 手动输入笔记链接
                 - 'auto': 自动选择（推荐）
         """
-        # 智能方法选择
-        if method == 'auto' or (method == 'manual' and self._is_user_profile_url()):
-            # 如果提供了完整的用户主页URL，自动使用playwright
-            actual_method = 'playwright'
-            print(f"[提示] 检测到用户主页URL，自动使用 Playwright 获取笔记列表")
+        # 智能方法选择: 输入本身就是笔记链接或链接文件时跳过浏览器
+        if self._note_match:
+            actual_method = 'note'
+            print(f"[提示] 检测到笔记链接，直接下载该笔记")
+        elif self._link_file:
+            actual_method = 'file'
+            print(f"[提示] 检测到链接文件，从文件读取笔记链接")
+        elif method == 'auto' or (method == 'manual' and self._is_user_profile_url()):
+            # 自动模式优先走接口 (无需浏览器)，接口不可用时回退到 Playwright
+            actual_method = 'api'
+            print(f"[提示] 自动模式: 优先使用接口获取笔记列表，失败时回退到 Playwright")
         else:
             actual_method = method
 
@@ -507,16 +901,33 @@ class XHSUserMonitor:
         print(f"用户ID: {self.user_id}")
         print(f"下载目录: {self.download_dir}")
         print(f"下载间隔: {self.delay} 秒")
+        print(f"并发数量: {self.concurrency}")
         print(f"最大数量: {self.max_notes if self.max_notes > 0 else '全部'}")
         print(f"获取方式: {actual_method}")
         print("=" * 60)
         print()
 
         # 获取笔记列表
-        if actual_method == 'playwright':
+        if actual_method == 'api':
+            notes = await self.fetch_user_notes_from_api()
+            if notes is None:
+                print("[提示] 回退到 Playwright 获取笔记列表")
+                notes = await self.fetch_user_notes_from_page()
+        elif actual_method == 'playwright':
             notes = await self.fetch_user_notes_from_page()
+        elif actual_method == 'note':
+            note_id = self._note_match.group(1)
+            notes = [UserNote(
+                note_id=note_id,
+                note_url=self.user_url.strip(),
+                title=f"笔记_{note_id}",
+                note_type="unknown"
+            )]
         elif actual_method == 'file':
-            file_path = input("请输入笔记链接文件路径: ").strip()
+            if self._link_file:
+                file_path = self.user_url.strip()
+            else:
+                file_path = input("请输入笔记链接文件路径: ").strip()
             notes = await self.fetch_user_notes_from_file(file_path)
         elif actual_method == 'manual':
             notes = await self.fetch_user_notes_manual()
@@ -529,7 +940,10 @@ class XHSUserMonitor:
             return
 
         # 批量下载
-        await self.download_all_notes(notes)
+        try:
+            await self.download_all_notes(notes)
+        finally:
+            self.close()
 
 
 # ==========================================
@@ -543,11 +957,18 @@ def parse_args():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 使用示例:
-  # 使用 Playwright 自动获取笔记列表并下载
+  # 自动获取笔记列表并下载 (优先接口，失败时回退到 Playwright)
   python standalone_xhs.py --user-url "https://www.xiaohongshu.com/user/profile/xxx"
+
+  # 只使用接口获取笔记列表
+  python standalone_xhs.py --user-url "xxx" --method api
   
   # 从文件读取笔记链接
   python standalone_xhs.py --user-url "xxx" --method file
+
+  # 直接下载单个笔记或链接文件中的笔记 (不启动浏览器)
+  python standalone_xhs.py --user-url "https://www.xiaohongshu.com/explore/xxx?xsec_token=xxx"
+  python standalone_xhs.py --user-url note_links.txt
   
   # 手动输入笔记链接
   python standalone_xhs.py --user-url "xxx" --method manual
@@ -557,17 +978,20 @@ def parse_args():
   
   # 设置下载间隔
   python standalone_xhs.py --user-url "xxx" --delay 5
+
+  # 设置并发下载数
+  python standalone_xhs.py --user-url "xxx" --concurrency 8
         """
     )
 
     parser.add_argument(
         '--user-url',
         required=True,
-        help='用户主页链接或用户ID'
+        help='用户主页链接或用户ID (也可直接传入单个笔记链接或笔记链接文件路径)'
     )
     parser.add_argument(
         '--method',
-        choices=['auto', 'playwright', 'file', 'manual'],
+        choices=['auto', 'api', 'playwright', 'file', 'manual'],
         default='auto',
         help='获取笔记列表的方法 (默认: auto - 自动选择)'
     )
@@ -582,12 +1006,45 @@ def parse_args():
         default=3.0,
         help='下载间隔时间(秒) (默认: 3.0)'
     )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='同时下载的笔记数 (默认: 4)'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=2,
+        help='下载失败后的最大重试次数，按指数退避等待 (默认: 2)'
+    )
+    parser.add_argument(
+        '--early-stop',
+        type=int,
+        default=5,
+        help='获取笔记列表时连续遇到 N 个已下载笔记即停止，用于增量更新，0表示关闭 (默认: 5)'
+    )
     parser.add_argument(
         '--max-notes',
         type=int,
         default=0,
         help='最大下载笔记数，0表示全部 (默认: 0)'
     )
+    parser.add_argument(
+        '--show-browser',
+        action='store_true',
+        help='显示 Playwright 浏览器窗口 (默认无头模式)'
+    )
+    parser.add_argument(
+        '--browser-endpoint',
+        default=None,
+        help='连接已运行的浏览器而不是每次启动 (ws://... 或 CDP 地址 http://...)'
+    )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='输出每个笔记的详细过程 (开始下载的链接、已下载跳过的笔记)'
+    )
     parser.add_argument(
         '--no-skip-existing',
         action='store_true',
@@ -626,6 +1083,12 @@ async def main():
             save_text=not args.no_text,
             download_image=not args.no_image,
             download_video=not args.no_video,
+            concurrency=args.concurrency,
+            show_browser=args.show_browser,
+            browser_endpoint=args.browser_endpoint,
+            verbose=args.verbose,
+            max_retries=args.retries,
+            early_stop=args.early_stop,
         )
 
         await monitor.run(method=args.method)
@@ -639,4 +1102,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # 可选: 安装了 uvloop 时使用基于 libuv 的事件循环 (仅 Linux/macOS)，否则使用标准库事件循环
+    uvloop = None
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+        except ImportError:
+            pass
+    (uvloop.run if uvloop else asyncio.run)(main())
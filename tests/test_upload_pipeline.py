@@ -0,0 +1,65 @@
+"""
+standalone_upload 流水线测试: 跳过人工审核时, 本地已有视频的 AI 分析应与 NAS 拉取并行
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import standalone_upload
+except (ImportError, FileNotFoundError) as e:
+    # 依赖未安装或缺少 .env 配置时跳过
+    pytest.skip(f"无法导入 standalone_upload: {e}", allow_module_level=True)
+
+
+def _make_uploader(video_dir):
+    """构造只包含流水线所需属性的 VideoUploader (不登录、不初始化 AI)"""
+    uploader = object.__new__(standalone_upload.VideoUploader)
+    uploader.config = SimpleNamespace(VIDEO_DIR=video_dir, UPLOAD_CONCURRENCY=1, AI_CONCURRENCY=2)
+    uploader.uploaded_history = set()
+    return uploader
+
+
+def test_local_analysis_starts_before_nas_fetch_completes(tmp_path):
+    (tmp_path / 'local.mp4').write_bytes(b'')
+    uploader = _make_uploader(tmp_path)
+
+    events = []
+    analysis_started = asyncio.Event()
+    report = {}
+
+    async def fake_generate(video_path, metadata_exists=None, allow_fallback=True):
+        events.append(f"analyze:{video_path.name}")
+        analysis_started.set()
+        return video_path.with_suffix('.txt')
+
+    async def fake_upload(video_path, metadata_file):
+        events.append(f"upload:{video_path.name}")
+        return True
+
+    async def fake_fetch():
+        # 本地视频的分析开始之前不完成拉取; 若流水线先等待拉取则会超时
+        await analysis_started.wait()
+        (tmp_path / 'nas.mp4').write_bytes(b'')
+        events.append("fetch_done")
+
+    uploader.generate_metadata_file = fake_generate
+    uploader.upload_single_video = fake_upload
+    uploader._report_completion = lambda total, failed: report.update(total=total, failed=failed)
+
+    async def run():
+        pending = uploader._pending_videos()
+        fetch_task = asyncio.create_task(fake_fetch())
+        await asyncio.wait_for(uploader._upload_pipeline(pending, fetch_task), timeout=5)
+
+    asyncio.run(run())
+
+    assert events.index("analyze:local.mp4") < events.index("fetch_done")
+    assert events.index("fetch_done") < events.index("analyze:nas.mp4")
+    assert "upload:nas.mp4" in events
+    assert report == {'total': 2, 'failed': []}
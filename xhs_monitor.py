@@ -117,6 +117,7 @@ class XHSBloggerMonitor:
             downloader: XHSDownloader,
             notifier: BarkNotifier,
             seen_file_dir: Path,
+            context_provider,
             cookie: str = "",
     ):
         """
@@ -126,6 +127,7 @@ class XHSBloggerMonitor:
             downloader: 已初始化的 XHSDownloader 实例
             notifier: Bark 推送实例
             seen_file_dir: 已知笔记 ID 记录文件目录
+            context_provider: 返回共享 Playwright 浏览器上下文的异步函数（由调度器提供，跨轮次复用）
             cookie: 小红书 Cookie
         """
         self.user_url = user_url
@@ -133,6 +135,7 @@ class XHSBloggerMonitor:
         self.download_dir = Path(download_dir)
         self.downloader = downloader
         self.notifier = notifier
+        self.context_provider = context_provider
         self.cookie = cookie or os.getenv("XHS_COOKIE", "")
 
         # 已知笔记 ID 持久化文件
@@ -144,9 +147,6 @@ class XHSBloggerMonitor:
         # 内存中的已知笔记集合
         self._seen_ids: Set[str] = self._load_seen_ids()
 
-        # Cookie 存储文件，用于免登录
-        self.storage_state_file = self.download_dir / ".xhs_storage_state.json"
-
         logger.info(f"[初始化] 博主 {self.user_id}，已知笔记数: {len(self._seen_ids)}")
 
     @staticmethod
@@ -186,66 +186,6 @@ class XHSBloggerMonitor:
         except Exception as e:
             logger.error(f"[记录] 保存记录文件失败: {e}")
 
-    async def _create_browser_context(self):
-        """创建并配置 Playwright 浏览器上下文"""
-        from playwright.async_api import async_playwright
-
-        pw = await async_playwright().start()
-        browser = await pw.chromium.launch(
-            headless=False,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-infobars",
-                "--window-size=1280,900",
-            ],
-        )
-        context_args = {
-            "user_agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            "viewport": {"width": 1280, "height": 900},
-            "locale": "zh-CN",
-        }
-
-        has_state = hasattr(self, 'storage_state_file') and self.storage_state_file.exists()
-        # 尝试加载持久化的登录状态
-        if has_state:
-            context_args["storage_state"] = str(self.storage_state_file)
-            
-        context = await browser.new_context(**context_args)
-        await context.add_init_script(
-            """
-                        Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                        window.chrome = {runtime: {}};
-                    """
-        )
-
-        # 只有在没有本地缓存状态时，才注入从 .env 解析旧的 Cookie
-        # (避免旧的 Cookie 覆盖掉持久化的最新 Cookie 导致每次都要重新登录)
-        if self.cookie and not has_state:
-            cookies = []
-            for item in self.cookie.split(";"):
-                item = item.strip()
-                if "=" in item:
-                    name, value = item.split("=", 1)
-                    cookies.append(
-                        {
-                            "name": name.strip(),
-                            "value": value.strip(),
-                            "domain": ".xiaohongshu.com",
-                            "path": "/",
-                        }
-                    )
-            if cookies:
-                await context.add_cookies(cookies)
-                logger.info(f"[浏览器] 已注入 {len(cookies)} 个 Cookie")
-
-        return pw, browser, context
-
     async def _get_note_ids_from_dom(self, page) -> List[Dict]:
         """从页面 DOM 中提取笔记 ID 列表"""
         card_infos = await page.evaluate(
@@ -423,13 +363,15 @@ class XHSBloggerMonitor:
             return 0
 
         user_profile_url = f"https://www.xiaohongshu.com/user/profile/{self.user_id}"
-        pw, browser, context = await self._create_browser_context()
         download_success = 0
         new_note_count = 0
+        page = None
 
         try:
+            # 浏览器由调度器统一启动并跨轮次复用，每轮只新开一个标签页
+            context = await self.context_provider()
             page = await context.new_page()
-            logger.info(f"[浏览器] 启动 Chromium 检查博主 {self.user_id}...")
+            logger.info(f"[浏览器] 打开新标签页检查博主 {self.user_id}...")
 
             await page.goto(user_profile_url, wait_until="domcontentloaded", timeout=40000)
             await page.wait_for_timeout(15000)
@@ -657,21 +599,12 @@ class XHSBloggerMonitor:
             import traceback
             traceback.print_exc()
         finally:
-            # 在关闭前保存 context 的 storage state (Cookie, Local Storage 等)
-            try:
-                if context:
-                    await context.storage_state(path=str(self.storage_state_file))
-            except Exception as e:
-                logger.warning(f"[浏览器] 保存 Cookie 状态失败: {e}")
-
-            try:
-                await browser.close()
-            except Exception:
-                pass
-            try:
-                await pw.stop()
-            except Exception:
-                pass
+            # 只关闭本轮的标签页，浏览器保留给下一轮
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
 
         self._save_seen_ids()
         logger.info(
@@ -728,6 +661,13 @@ class XHSMonitorScheduler:
         # 创建 Bark 推送器
         self.notifier = BarkNotifier(bark_key=bark_key)
 
+        # 共享 Playwright 浏览器（首次检查时启动，所有博主、所有轮次复用）
+        self._pw = None
+        self._browser = None
+        self._context = None
+        # Cookie 存储文件，用于免登录
+        self.storage_state_file = self.download_dir / ".xhs_storage_state.json"
+
         # 已知笔记记录目录
         seen_file_dir = self.download_dir / ".seen"
         seen_file_dir.mkdir(parents=True, exist_ok=True)
@@ -744,6 +684,7 @@ class XHSMonitorScheduler:
                 downloader=self.downloader,
                 notifier=self.notifier,
                 seen_file_dir=seen_file_dir,
+                context_provider=self._get_context,
                 cookie=self.cookie,
             )
             self.monitors.append(monitor)
@@ -765,10 +706,114 @@ class XHSMonitorScheduler:
             if len(self.monitors) > 1:
                 await asyncio.sleep(5)
 
+        # 每轮结束保存一次登录状态，程序异常退出时下次启动仍可免登录
+        await self._save_storage_state()
+
+    async def _get_context(self):
+        """
+        获取共享的 Playwright 浏览器上下文。
+        首次调用时启动浏览器，之后各博主、各轮次复用同一个浏览器和上下文，
+        省去每轮冷启动 Chromium 和注入 Cookie 的开销；浏览器意外退出时自动重建。
+        """
+        if self._context is not None and self._browser.is_connected():
+            return self._context
+        await self._close_browser()
+
+        from playwright.async_api import async_playwright
+
+        logger.info("[浏览器] 启动 Chromium...")
+        self._pw = await async_playwright().start()
+        self._browser = await self._pw.chromium.launch(
+            headless=False,
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                "--no-sandbox",
+                "--disable-dev-shm-usage",
+                "--disable-infobars",
+                "--window-size=1280,900",
+            ],
+        )
+        context_args = {
+            "user_agent": (
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                "AppleWebKit/537.36 (KHTML, like Gecko) "
+                "Chrome/120.0.0.0 Safari/537.36"
+            ),
+            "viewport": {"width": 1280, "height": 900},
+            "locale": "zh-CN",
+        }
+
+        has_state = self.storage_state_file.exists()
+        # 尝试加载持久化的登录状态
+        if has_state:
+            context_args["storage_state"] = str(self.storage_state_file)
+            
+        context = await self._browser.new_context(**context_args)
+        await context.add_init_script(
+            """
+                        Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+                        window.chrome = {runtime: {}};
+                    """
+        )
+
+        # 只有在没有本地缓存状态时，才注入从 .env 解析旧的 Cookie
+        # (避免旧的 Cookie 覆盖掉持久化的最新 Cookie 导致每次都要重新登录)
+        if self.cookie and not has_state:
+            cookies = []
+            for item in self.cookie.split(";"):
+                item = item.strip()
+                if "=" in item:
+                    name, value = item.split("=", 1)
+                    cookies.append(
+                        {
+                            "name": name.strip(),
+                            "value": value.strip(),
+                            "domain": ".xiaohongshu.com",
+                            "path": "/",
+                        }
+                    )
+            if cookies:
+                await context.add_cookies(cookies)
+                logger.info(f"[浏览器] 已注入 {len(cookies)} 个 Cookie")
+
+        self._context = context
+        return context
+
+    async def _save_storage_state(self):
+        """保存 context 的 storage state (Cookie, Local Storage 等)，用于下次启动免登录"""
+        if self._context is None:
+            return
+        try:
+            await self._context.storage_state(path=str(self.storage_state_file))
+        except Exception as e:
+            logger.warning(f"[浏览器] 保存 Cookie 状态失败: {e}")
+
+    async def _close_browser(self):
+        """保存登录状态并关闭共享浏览器"""
+        await self._save_storage_state()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+        if self._pw is not None:
+            try:
+                await self._pw.stop()
+            except Exception:
+                pass
+        self._pw = self._browser = self._context = None
+
     async def run(self):
         """启动监控主循环"""
         self._print_banner()
+        try:
+            await self._run_loop()
+        finally:
+            # 退出 (含 Ctrl+C) 时统一关闭共享浏览器
+            await self._close_browser()
 
+    async def _run_loop(self):
+        """轮询主循环"""
         if self.run_once:
             logger.info("[调度] 单次模式，执行一轮后退出")
             await self.run_round()